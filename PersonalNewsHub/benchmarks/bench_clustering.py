@@ -0,0 +1,138 @@
+"""Which titles count as one story, and the time to cluster one day's intake.
+
+First prints the exact word-bigram Jaccard similarity and the MinHash
+estimate for real title pairs: cross-posts of one story (SAME), which
+should reach SIMILARITY_THRESHOLD, and different stories with near-identical
+titles (DIFFERENT), which must stay below it.
+
+Then fills an in-memory database with ``window`` synthetic articles (already
+clustered) and clusters ``day`` new ones, of which a fraction are
+cross-posted copies of stories in the window. Compares the LSH lookup in
+clustering.cluster_articles with the all-pairs comparison it replaces.
+
+Usage: python benchmarks/bench_clustering.py [window] [day]   (default: 30000 1000)
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from clustering import SIMILARITY_THRESHOLD, cluster_articles, shingles, signature, similarity
+
+# One story as titled by two sources: case, punctuation and HN's "(year)" / "[pdf]" markers
+SAME = [
+    ("Python 3.13 released", "Python 3.13 Released!"),
+    ("Linux 6.18 released", "Linux 6.18 Released"),
+    ("Why SQLite uses bytecode (2024)", "Why SQLite Uses Bytecode"),
+    ("Cloudflare outage on November 18, 2025", "Cloudflare outage on November 18, 2025 [pdf]"),
+    ("The xz backdoor: how it happened", "The XZ backdoor – how it happened"),
+    ("Ladybird browser spreads its wings", "Ladybird Browser Spreads Its Wings"),
+    # Rewordings: not merged, as a reworded title is as close as a different story's
+    ("Show HN: Pyscript – run Python in the browser", "PyScript: run Python in the browser"),
+    ("Announcing Rust 1.80.0", "Announcing Rust 1.80.0 | Rust Blog"),
+    ("OpenAI announces GPT-5", "OpenAI unveils GPT-5, its newest model"),
+]
+
+# Different stories whose titles share a template
+DIFFERENT = [
+    ("Python 3.13 released", "Python 3.12 released"),
+    ("Linux 6.18 released", "Linux 6.17 released"),
+    ("Firefox 131 released", "Firefox 132 released"),
+    ("Announcing Rust 1.80.0", "Announcing Rust 1.81.0"),
+    ("This Week in Rust 570", "This Week in Rust 571"),
+    ("Apple announces M4 MacBook Pro", "Apple announces M4 iMac"),
+    ("Cloudflare outage on November 18, 2025", "Cloudflare outage on June 12, 2025"),
+    ("Show HN: My new Rust web framework", "Show HN: My new Go web framework"),
+    ("Ask HN: Who is hiring? (October 2025)", "Ask HN: Who is hiring? (November 2025)"),
+    ("Ask HN: What are you working on? (September 2025)", "Ask HN: What are you working on? (October 2025)"),
+    ("Show HN: I built a terminal UI for Postgres", "Show HN: I built a terminal UI for Kubernetes"),
+]
+
+SYLLABLES = "ka lo mi nu pe ra si to vu ze bri cla dro fen gis hal jor kem lun mor".split()
+
+
+def vocabulary(size, rng):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+WORDS = vocabulary(5000, random.Random(0))
+
+
+def headline(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 10))) + f" {rng.randrange(10**6)}"
+
+
+def cross_post(title, rng):
+    # The same title as another source would show it
+    variant = rng.choice([str.title, str.upper, lambda t: t + "!", lambda t: t + " [pdf]", lambda t: t + " (2025)"])
+    return variant(title)
+
+
+def print_pairs():
+    print(f"Title pairs (threshold {SIMILARITY_THRESHOLD}):  jaccard  minhash  merged")
+    for label, pairs in (("SAME", SAME), ("DIFFERENT", DIFFERENT)):
+        print(label)
+        for a, b in pairs:
+            shingles_a, shingles_b = shingles(a), shingles(b)
+            jaccard = len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+            estimate = similarity(signature(a), signature(b))
+            merged = "yes" if estimate >= SIMILARITY_THRESHOLD else "no"
+            print(f"  {jaccard:7.2f}  {estimate:7.2f}  {merged:6}  {a} / {b}")
+    print()
+
+
+def setup():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript('''
+    CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT, summary TEXT,
+                           added_date TEXT DEFAULT CURRENT_TIMESTAMP, cluster_id INTEGER);
+    CREATE TABLE article_minhash (article_id INTEGER PRIMARY KEY, signature BLOB NOT NULL);
+    CREATE TABLE lsh_buckets (band INTEGER NOT NULL, bucket INTEGER NOT NULL, article_id INTEGER NOT NULL,
+                              PRIMARY KEY (band, bucket, article_id)) WITHOUT ROWID;
+    CREATE TABLE app_state (key TEXT PRIMARY KEY, value INTEGER);
+    INSERT INTO app_state VALUES ('data_version', 0);
+    ''')
+    return conn
+
+
+def insert(conn, titles, first_id):
+    records = [{"id": first_id + i, "title": title, "summary": ""} for i, title in enumerate(titles)]
+    conn.executemany("INSERT INTO articles (id, title, summary) VALUES (?, ?, ?)",
+                     [(r["id"], r["title"], r["summary"]) for r in records])
+    return records
+
+
+if __name__ == "__main__":
+    window = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    day = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    rng = random.Random(1)
+    print_pairs()
+
+    conn = setup()
+    old_titles = [headline(rng) for _ in range(window)]
+    start = time.perf_counter()
+    cluster_articles(conn, insert(conn, old_titles, 1))
+    print(f"Clustered the {window:,}-article window in {time.perf_counter() - start:.1f}s")
+
+    duplicates = day // 5
+    new_titles = [cross_post(rng.choice(old_titles), rng) for _ in range(duplicates)]
+    new_titles += [headline(rng) for _ in range(day - duplicates)]
+    records = insert(conn, new_titles, window + 1)
+
+    start = time.perf_counter()
+    joined = cluster_articles(conn, records)
+    lsh = time.perf_counter() - start
+    print(f"LSH:       {day:,} new articles in {lsh:.2f}s, {joined} joined a story ({duplicates} planted duplicates)")
+
+    # All-pairs baseline on a sample, extrapolated to the full day
+    old_signatures = [signature(title) for title in old_titles]
+    sample = records[:50]
+    start = time.perf_counter()
+    for record in sample:
+        sig = signature(record["title"])
+        any(similarity(sig, other) >= SIMILARITY_THRESHOLD for other in old_signatures)
+    pairwise = (time.perf_counter() - start) / len(sample) * day
+    print(f"Pairwise:  ~{pairwise:.1f}s for the same day (extrapolated from {len(sample)} articles)")
@@ -0,0 +1,116 @@
+"""End-to-end fetch cycles against the fake upstream, with no network access.
+
+Starts benchmarks/fake_upstream.py in-process, writes a sources config that
+points HackerNews, Reddit, arXiv and ``--feeds`` RSS feeds at it, and runs
+``fetch_all_sources`` in a scratch directory: one cold cycle into an empty
+database, then warm cycles where the upstream answers 304 (or, with
+``--no-validators``, re-sends everything for the dedup filter to drop).
+
+Per cycle it reports wall time, the fetcher's metrics (time in each phase,
+summed across threads, and the throughput of each; parse time includes
+waiting for a free parse worker), peak RSS of this process and of the
+parse workers, and the database size.
+
+Usage: python benchmarks/bench_cycle.py [--feeds 20] [--scale 1] [--latency 0.05] [--cycles 3] [--no-validators]
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS, ".."))
+sys.path.insert(0, BENCHMARKS)
+
+import metrics
+import personalnewsaggregator
+from fake_upstream import FakeUpstream
+
+MIB = 1024 * 1024
+
+
+def phase_totals():
+    totals = {}
+    for (name, labels), (_, seconds, _) in metrics.REGISTRY.histograms.items():
+        if name == "newshub_phase_seconds":
+            phase = dict(labels)["phase"]
+            totals[phase] = totals.get(phase, 0.0) + seconds
+    return totals
+
+
+def counter_total(name):
+    return sum(value for (counter, _), value in metrics.REGISTRY.counters.items() if counter == name)
+
+
+def peak_rss():
+    # ru_maxrss is in KiB on Linux; children are the parse workers that have exited
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024)
+
+
+def database_size():
+    return sum(os.path.getsize(path) for path in ("news_aggregator.db", "news_aggregator.db-wal") if os.path.exists(path))
+
+
+def run_cycle(verbose=False):
+    metrics.REGISTRY.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        personalnewsaggregator.fetch_all_sources()
+    return time.perf_counter() - start
+
+
+def report(label, elapsed, upstream_requests):
+    phases = phase_totals()
+    seen = counter_total("newshub_items_seen_total")
+    inserted = counter_total("newshub_items_inserted_total")
+    downloaded = counter_total("newshub_fetch_bytes_total")
+    not_modified = counter_total("newshub_fetch_not_modified_total")
+    errors = counter_total("newshub_fetch_errors_total")
+
+    print(f"{label}: {elapsed:.2f}s wall, {upstream_requests} requests ({not_modified} not modified, {errors} errors), "
+          f"{downloaded / MIB:.2f} MiB downloaded, {seen} items parsed, {inserted} inserted")
+    rates = {
+        "network": (downloaded / MIB, "MiB/s"),
+        "parse": (seen, "items/s"),
+        "tag": (seen, "items/s"),
+        "db": (inserted, "inserted/s"),
+    }
+    for phase in ("network", "parse", "tag", "db"):
+        seconds = phases.get(phase, 0.0)
+        amount, unit = rates[phase]
+        rate = f"{amount / seconds:10.1f} {unit}" if seconds and amount else ""
+        print(f"  {phase:8} {seconds:7.3f}s {rate}")
+    own, workers = peak_rss()
+    print(f"  peak RSS {own / MIB:.0f} MiB (parse workers {workers / MIB:.0f} MiB), "
+          f"database {database_size() / MIB:.2f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--feeds", type=int, default=20, help="RSS feeds to poll")
+    parser.add_argument("--scale", type=int, default=1, help="repeat each fixture's items this many times")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake upstream waits per response")
+    parser.add_argument("--cycles", type=int, default=3, help="cold cycle plus warm cycles")
+    parser.add_argument("--no-validators", action="store_true", help="upstream never answers 304")
+    parser.add_argument("--verbose", action="store_true", help="show the fetcher's own output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="newshub-bench-")
+    os.chdir(workdir)  # The fetcher writes news_aggregator.db and recent_news.json to the working directory
+
+    with FakeUpstream(latency=args.latency, scale=args.scale, validators=not args.no_validators) as upstream:
+        with open("sources.toml", "w") as f:
+            f.write(upstream.sources_config(args.feeds))
+        personalnewsaggregator.use_sources_config("sources.toml")
+
+        print(f"{args.feeds} RSS feeds + HackerNews, Reddit, arXiv; scale {args.scale}, "
+              f"latency {args.latency * 1000:.0f} ms, {os.cpu_count()} CPUs, scratch dir {workdir}")
+        for cycle in range(args.cycles):
+            before = upstream.requests
+            elapsed = run_cycle(args.verbose)
+            report(f"cycle {cycle + 1} ({'cold' if cycle == 0 else 'warm'})", elapsed, upstream.requests - before)
@@ -0,0 +1,61 @@
+"""Memory use and false-positive rate of the URL dedup filter at millions of URLs.
+
+Compares the Bloom filter in dedup.UrlDedup with a Python set of 64-bit
+URL hashes, and measures the observed false-positive rate on URLs that
+were never added.
+
+Usage: python benchmarks/bench_dedup.py [sizes...]   (default: 1000000)
+"""
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dedup import UrlDedup, url_key
+
+PROBES = 200_000
+
+
+def synthetic_url(i):
+    return f"https://www.site{i % 5000}.com/news/2024/{i}/story-title-{i}?utm_source=rss"
+
+
+def hash64(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def bench_bloom(n):
+    dedup = UrlDedup(capacity=n)
+    start = time.perf_counter()
+    dedup.filter_new({"url": synthetic_url(i)} for i in range(n))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = sum(1 for i in range(n, n + PROBES) if synthetic_url(i) in dedup)
+    probe = time.perf_counter() - start
+
+    report = dedup.report()
+    print(f"  bloom filter   {report['memory_bytes'] / 1024 / 1024:8.1f} MiB  "
+          f"build {build:6.1f}s  {PROBES / probe:>9,.0f} lookups/s  "
+          f"fp expected {report['false_positive_rate']:.1e}, observed {false_positives}/{PROBES}")
+
+
+def bench_hash_set(n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    hashes = {hash64(url_key(synthetic_url(i))) for i in range(n)}
+    build = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  64-bit set     {memory / 1024 / 1024:8.1f} MiB  build {build:6.1f}s  ({len(hashes):,} hashes)")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000]
+    for n in sizes:
+        print(f"{n:,} URLs")
+        bench_bloom(n)
+        bench_hash_set(n)
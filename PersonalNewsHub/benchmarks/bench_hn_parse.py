@@ -0,0 +1,73 @@
+"""Compare the old HackerNews parsing loop with sources.hackernews backends.
+
+Uses the saved front page in benchmarks/fixtures/hn_frontpage.html, plus a
+copy scaled up to more rows to show how each approach grows with page size.
+
+Usage: python benchmarks/bench_hn_parse.py [iterations]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup
+
+from sources import hackernews
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hn_frontpage.html")
+
+
+# The parsing loop fetch_hackernews used before sources.hackernews
+def legacy_parse(html, url=hackernews.HN_URL):
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
+    for row in soup.select("tr.athing"):
+        title_element = row.select_one(".titleline > a")
+        if not title_element:
+            continue
+        title = title_element.text.strip()
+        link = title_element.get('href', '')
+        if link.startswith('item?'):
+            link = f"{url}{link}"
+        item_id = row.get('id')
+        subtext_row = soup.select_one(f"tr#score_{item_id}")
+        points = 0
+        if subtext_row:
+            points_element = subtext_row.select_one(".score")
+            if points_element:
+                points_text = points_element.text.strip()
+                points = int(re.search(r'\d+', points_text).group()) if re.search(r'\d+', points_text) else 0
+        items.append({"title": title, "url": link, "points": points})
+    return items
+
+
+def scaled_page(html, copies):
+    # Repeat the item rows with fresh ids to simulate a much longer listing
+    start = html.index('<tr class="athing')
+    end = html.index('<tr class="morespace"')
+    rows = html[start:end]
+    scaled = "".join(re.sub(r"(\d{8})", lambda m: f"{m.group(1)}{n}", rows) for n in range(copies))
+    return html[:start] + scaled + html[end:]
+
+
+def timed(label, fn, html, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        count = len(fn(html))
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{label:>14} {count:>5} items  {elapsed * 1000:9.2f} ms/page")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with open(FIXTURE, encoding="utf-8") as f:
+        fixture = f.read()
+
+    for copies in (1, 10):
+        html = scaled_page(fixture, copies)
+        print(f"page with {30 * copies} rows ({len(html) // 1024} KiB)")
+        timed("legacy", legacy_parse, html, max(1, iterations // copies))
+        for backend in hackernews.available_backends():
+            timed(backend, lambda page, b=backend: hackernews.parse_front_page(page, backend=b), html, iterations)
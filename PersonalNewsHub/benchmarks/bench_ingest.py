@@ -0,0 +1,77 @@
+"""Compare the old row-by-row insert path with ingest_articles.
+
+Usage: python benchmarks/bench_ingest.py [sizes...]   (default: 10000 100000)
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ingest import ingest_articles
+from personalnewsaggregator import setup_database
+
+
+def synthetic_records(n):
+    return [
+        {
+            "title": f"Synthetic article {i} about Python and AI",
+            "url": f"https://example.com/articles/{i}",
+            "source": f"Source {i % 10}",
+            "published_date": "2024-01-01 00:00:00",
+            "summary": "Lorem ipsum " * 20,
+            "category": "Tech",
+            "tags": ["Python", "AI", f"tag{i % 50}"]
+        }
+        for i in range(n)
+    ]
+
+
+# The insert loop every fetcher used before ingest_articles (tag names now go
+# through the tags dictionary, one lookup per tag)
+def legacy_insert(conn, records):
+    cursor = conn.cursor()
+    for record in records:
+        try:
+            cursor.execute(
+                "INSERT OR IGNORE INTO articles (title, url, source, published_date, summary, category) VALUES (?, ?, ?, ?, ?, ?)",
+                (record["title"], record["url"], record["source"], record["published_date"],
+                 record["summary"], record["category"])
+            )
+            if cursor.rowcount > 0:
+                article_id = cursor.lastrowid
+                for tag in record["tags"]:
+                    cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag,))
+                    tag_id = cursor.execute("SELECT id FROM tags WHERE name = ?", (tag,)).fetchone()[0]
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO article_tags (article_id, tag_id) VALUES (?, ?)",
+                        (article_id, tag_id)
+                    )
+        except sqlite3.IntegrityError:
+            pass
+    conn.commit()
+
+
+def run(label, insert, records):
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            conn, _ = setup_database()
+            start = time.perf_counter()
+            insert(conn, records)
+            elapsed = time.perf_counter() - start
+            conn.close()
+        finally:
+            os.chdir(cwd)
+    print(f"{label:>16} {len(records):>8} rows  {elapsed:8.2f}s  {len(records) / elapsed:>10,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        records = synthetic_records(size)
+        run("row-by-row", legacy_insert, records)
+        run("ingest_articles", ingest_articles, records)
@@ -0,0 +1,159 @@
+"""Keeping many open dashboards current: live push (/events) vs reloading the page.
+
+Seeds a database like bench_web.py, serves webinterface.app in a separate
+process and keeps ``--clients`` dashboards open while this process ingests
+a batch of ``--batch`` articles every ``--interval`` seconds:
+
+    live     each client holds an /events stream and records when every new article arrives
+    reload   each client re-requests / every ``--interval`` seconds, as a reloading tab would
+
+For both, reports the web server's CPU time, how long new articles took to
+reach clients (live) or how long a reload took (reload), and how many
+new-article queries the server ran (from /metrics).
+
+Usage: python benchmarks/bench_live.py [--articles 100000] [--clients 50] [--interval 2] [--duration 20] [--batch 20]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import requests
+
+import database
+from bench_read_write import records
+from bench_web import free_port, percentile, seed_database, serve, wait_until_up
+from ingest import ingest_articles, set_high_water
+from live_updates import POLL_INTERVAL
+
+
+def cpu_seconds(pid):
+    # utime + stime of the server process, from /proc (Linux)
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def live_batches(base_url):
+    for line in requests.get(base_url + "/metrics").text.splitlines():
+        if line.startswith("newshub_live_batches_total"):
+            return int(float(line.split()[-1]))
+    return 0
+
+
+def ingest_loop(path, batch, interval, stop, committed):
+    conn = database.connect_writer(path)
+    rng = random.Random(3)
+    start = time.time_ns() // 1000  # URLs not already in a kept database
+    while not stop.wait(interval):
+        added = ingest_articles(conn, records(rng, start, batch))
+        # As ingest_fetched does once the batch is clustered
+        set_high_water(conn, added[-1]["id"])
+        conn.commit()
+        now = time.perf_counter()
+        for record in added:
+            committed[record["id"]] = now
+        start += batch
+    conn.close()
+
+
+def live_client(base_url, stop, received):
+    response = requests.get(base_url + "/events", stream=True, timeout=60)
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("data: ["):
+            now = time.perf_counter()
+            received.extend((article["id"], now) for article in json.loads(line[6:]))
+        if stop.is_set():
+            break
+    response.close()
+
+
+def reload_client(base_url, interval, stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(base_url + "/")
+        latencies.append(time.perf_counter() - start)
+        stop.wait(max(0.0, interval - (time.perf_counter() - start)))
+
+
+def run(mode, base_url, server_pid, path, args):
+    stop = threading.Event()
+    committed, results = {}, []
+    if mode == "live":
+        clients = [threading.Thread(target=live_client, args=(base_url, stop, results)) for _ in range(args.clients)]
+    else:
+        clients = [threading.Thread(target=reload_client, args=(base_url, args.interval, stop, results))
+                   for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+    time.sleep(1.0)  # Let every client connect and render once
+
+    batches = live_batches(base_url)
+    cpu = cpu_seconds(server_pid)
+    writer = threading.Thread(target=ingest_loop, args=(path, args.batch, args.interval, stop, committed))
+    writer.start()
+    time.sleep(args.duration)
+    stop.set()
+    writer.join()
+    time.sleep(2 * POLL_INTERVAL)  # Let the last batch reach the live clients
+    # New articles wake the live streams so they notice the stop
+    conn = database.connect_writer(path)
+    set_high_water(conn, ingest_articles(conn, records(random.Random(4), time.time_ns() // 1000, 1))[0]["id"])
+    conn.commit()
+    conn.close()
+    for client in clients:
+        client.join(timeout=10)
+    cpu = cpu_seconds(server_pid) - cpu
+    batches = live_batches(base_url) - batches
+
+    if mode == "live":
+        delays = sorted(at - committed[article_id] for article_id, at in results if article_id in committed)
+        expected = len(committed) * args.clients
+        print(f"  {mode:7} {cpu:8.2f} {percentile(delays, 0.5) * 1000:12.1f} {percentile(delays, 0.95) * 1000:12.1f} "
+              f"{batches:9}   {len(delays)}/{expected} articles delivered")
+    else:
+        latencies = sorted(results)
+        print(f"  {mode:7} {cpu:8.2f} {percentile(latencies, 0.5) * 1000:12.1f} "
+              f"{percentile(latencies, 0.95) * 1000:12.1f} {batches:9}   {len(latencies)} page loads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--articles", type=int, default=100000, help="articles seeded before measuring")
+    parser.add_argument("--clients", type=int, default=50, help="open dashboards")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between ingestions (and reloads)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured per mode")
+    parser.add_argument("--batch", type=int, default=20, help="articles per ingestion")
+    parser.add_argument("--keep", help="directory for the seeded database (default: a scratch dir)")
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.keep or tempfile.mkdtemp(prefix="newshub-live-"))
+    seed_database(directory, args.articles)
+    path = os.path.join(directory, "news_aggregator.db")
+    from personalnewsaggregator import setup_database
+    conn, _ = setup_database()  # Brings a kept database up to the current schema
+    conn.close()
+
+    print(f"{args.articles} articles, {args.clients} clients, {args.batch} new articles every {args.interval:g}s "
+          f"for {args.duration:g}s, {os.cpu_count()} CPUs")
+    print(f"  {'mode':7} {'server s':>8} {'p50 ms':>12} {'p95 ms':>12} {'queries':>9}")
+    for mode in ("live", "reload"):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = multiprocessing.get_context("spawn").Process(target=serve, args=(directory, port), daemon=True)
+        server.start()
+        try:
+            wait_until_up(base_url)
+            run(mode, base_url, server.pid, path, args)
+        finally:
+            server.terminate()
+            server.join()
+    print("p50/p95: commit-to-client delay for live, page load time for reload")
@@ -0,0 +1,60 @@
+"""Parsing a large batch of feeds: fetch threads alone vs threads + ParsePool.
+
+Builds synthetic RSS documents in memory and runs one FetchEngine job per
+feed that hands the raw bytes to the RSS source's parse function, exactly
+as RssSource.fetch does after its download. Without a parse pool the
+feedparser and tagging work competes for the GIL across the fetch
+threads. With one it runs in worker processes.
+
+Usage: python benchmarks/bench_parse_pool.py [feeds] [entries]   (default: 200 40)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fetch_engine import FetchEngine
+from parse_pool import ParsePool
+from sources import rss
+
+LOREM = ("Researchers released a new open source model for Python developers, with better "
+         "security defaults, faster inference on GPU clusters and a smaller cloud bill. ") * 4
+
+
+def synthetic_feed(index, entries):
+    items = "".join(
+        f"<item><title>Feed {index} story {i}: AI tooling for Rust and Python</title>"
+        f"<link>https://feed{index}.example.com/{i}</link>"
+        f"<pubDate>Mon, 01 Jan 2024 00:{i % 60:02d}:00 GMT</pubDate>"
+        f"<description>&lt;p&gt;{LOREM}&lt;/p&gt;</description></item>"
+        for i in range(entries)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {index}</title>'
+            f"{items}</channel></rss>").encode()
+
+
+def run(bodies, entries, parse_pool):
+    settings = {"name": "Bench", "category": "Tech News", "limit": entries}
+    jobs = [(f"feed{i}", lambda engine, body=body: engine.parse(rss.parse_records, body, settings))
+            for i, body in enumerate(bodies)]
+    start = time.perf_counter()
+    with FetchEngine(parse_pool=parse_pool) as engine:
+        records = sum(len(result) for _, result in engine.run(jobs))
+    return records, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    feeds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    bodies = [synthetic_feed(i, entries) for i in range(feeds)]
+    print(f"{feeds} feeds x {entries} entries ({sum(map(len, bodies)) / 1024 / 1024:.1f} MiB), "
+          f"{os.cpu_count()} CPUs")
+
+    records, elapsed = run(bodies, entries, None)
+    print(f"  fetch threads only   {elapsed:6.2f}s  ({records} records)")
+
+    with ParsePool() as parse_pool:
+        parse_pool.parse(rss.extract_tags, "warm up")  # Exclude worker start-up from the timing
+        records, elapsed = run(bodies, entries, parse_pool)
+    print(f"  threads + ParsePool  {elapsed:6.2f}s  ({records} records, {parse_pool.max_workers} workers)")
@@ -0,0 +1,165 @@
+"""Dashboard read latency while ingestion writes: rollback journal vs WAL + reader pool.
+
+Seeds a scratch database, then has ``--readers`` threads run the dashboard's
+page query and filter lookups in a loop, first with the database idle and
+then while a separate writer process ingests batches of new articles with
+ingest_articles. Two setups are compared:
+
+    legacy   journal_mode=DELETE, a new sqlite3.connect() per read (as before database.py)
+    wal      journal_mode=WAL with the database.py pragmas, ReaderPool connections
+
+Usage: python benchmarks/bench_read_write.py [--articles 50000] [--readers 4] [--duration 5] [--batch 2000]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import database
+from ingest import ingest_articles
+
+WORDS = ("open source model python rust startup cloud security release benchmark compiler database "
+         "kubernetes privacy gpu inference llm research funding browser linux apple google agent").split()
+TAGS = ["AI", "Python", "Rust", "Security", "Cloud", "Startups", "Linux", "GPU", "Privacy", "Research"]
+
+
+def records(rng, start, count):
+    return [{
+        "title": " ".join(rng.choices(WORDS, k=8)),
+        "url": f"https://site{n % 997}.example.com/story/{n}",
+        "source": rng.choice(["HackerNews", "Reddit/r/programming", "ArXiv", "TechCrunch"]),
+        "summary": " ".join(rng.choices(WORDS, k=40)),
+        "category": rng.choice(["Tech", "AI", "Research", "Tech News"]),
+        "tags": rng.sample(TAGS, 3),
+    } for n in range(start, start + count)]
+
+
+def seed(path, articles):
+    from personalnewsaggregator import setup_database
+
+    os.environ["NEWSHUB_DB"] = path
+    conn, _ = setup_database()
+    rng = random.Random(1)
+    for start in range(0, articles, 10000):
+        ingest_articles(conn, records(rng, start, min(10000, articles - start)))
+    conn.close()
+
+
+def write_loop(path, mode, batch, start, stop):
+    # Writer process: one ingestion transaction per batch until told to stop
+    conn = database.connect_writer(path) if mode == "wal" else sqlite3.connect(path)
+    rng = random.Random(2)
+    while not stop.is_set():
+        ingest_articles(conn, records(rng, start, batch))
+        start += batch
+    conn.close()
+
+
+def dashboard_read(conn):
+    conn.execute(
+        "SELECT a.id, a.title, a.url, a.source, a.added_date, "
+        "(SELECT GROUP_CONCAT(g.name, ',') FROM article_tags t JOIN tags g ON g.id = t.tag_id "
+        "WHERE t.article_id = a.id) "
+        "FROM articles a WHERE a.added_date >= DATE('now', '-7 days') "
+        "ORDER BY a.added_date DESC, a.id DESC LIMIT 51"
+    ).fetchall()
+    conn.execute("SELECT source FROM stats_source ORDER BY source").fetchall()
+    conn.execute("SELECT name, article_count FROM tags ORDER BY article_count DESC LIMIT 20").fetchall()
+
+
+def read_load(path, mode, readers, duration):
+    pool = database.ReaderPool(path, size=readers) if mode == "wal" else None
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+
+    def reader():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if pool is not None:
+                    with pool.connection() as conn:
+                        dashboard_read(conn)
+                else:
+                    conn = sqlite3.connect(path)
+                    try:
+                        dashboard_read(conn)
+                    finally:
+                        conn.close()
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors.append(time.perf_counter() - start)  # "database is locked"
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if pool is not None:
+        pool.close()
+    return sorted(latencies), len(errors)
+
+
+def report(label, latencies, errors, duration, written=None):
+    def pct(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else float("nan")
+
+    extra = f"  ({written} articles written)" if written is not None else ""
+    print(f"  {label:18} {len(latencies) / duration:8.1f} {pct(0.5):8.2f} {pct(0.95):8.2f} {pct(0.99):8.2f} "
+          f"{(latencies[-1] * 1000 if latencies else float('nan')):8.1f} {errors:7}{extra}")
+
+
+def count_articles(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--articles", type=int, default=50000, help="articles seeded before measuring")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measurement")
+    parser.add_argument("--batch", type=int, default=2000, help="articles per ingestion transaction")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="newshub-rw-")
+    template = os.path.join(workdir, "seed.db")
+    seed(template, args.articles)
+    print(f"{args.articles} seeded articles, {args.readers} readers, batches of {args.batch}, {os.cpu_count()} CPUs")
+    print(f"  {'':18} {'reads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+
+    context = multiprocessing.get_context("spawn")
+    for mode in ("legacy", "wal"):
+        path = os.path.join(workdir, f"{mode}.db")
+        shutil.copy(template, path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(template + suffix):
+                shutil.copy(template + suffix, path + suffix)
+        conn = sqlite3.connect(path)
+        conn.execute(f"PRAGMA journal_mode = {'WAL' if mode == 'wal' else 'DELETE'}")
+        conn.close()
+
+        print(mode)
+        report("idle", *read_load(path, mode, args.readers, args.duration), args.duration)
+
+        before = count_articles(path)
+        stop = context.Event()
+        writer = context.Process(target=write_loop, args=(path, mode, args.batch, 10_000_000, stop))
+        writer.start()
+        time.sleep(0.5)  # Let the writer get going
+        latencies, errors = read_load(path, mode, args.readers, args.duration)
+        stop.set()
+        writer.join()
+        report("during ingestion", latencies, errors, args.duration, count_articles(path) - before)
+
+    shutil.rmtree(workdir)
@@ -0,0 +1,106 @@
+"""Live database size and dashboard query time before and after retention.
+
+Seeds a database like bench_web.py (articles spread evenly over 90 days),
+times the dashboard's queries, then archives everything older than
+``--days`` with retention.archive_expired, returns the freed pages with
+incremental_vacuum and times the same queries again. Also reports the
+archive's size and how much the summary compression saved.
+
+Usage: python benchmarks/bench_retention.py [--articles 300000] [--days 30] [--repeat 10]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import database
+from bench_web import seed_database
+from retention import archive_expired, incremental_vacuum, retention_policy, unpack_summary
+
+QUERIES = [
+    ("home, 7 days", dict(days=7, collapse_stories=True)),
+    ("category, 30 days", dict(days=30, category="AI", collapse_stories=True)),
+    ("search, all time", dict(search="rust")),
+    ("tag page", dict(tag_id=2)),
+]
+
+
+def timed_queries(path, repeat):
+    from webinterface import fetch_page
+
+    conn = database.connect_reader(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        results = {}
+        for name, query_args in QUERIES:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fetch_page(conn, query_args)
+                best = min(best, time.perf_counter() - start)
+            results[name] = best * 1000
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+        live = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    finally:
+        conn.close()
+    return live, pages, results
+
+
+def compression(archive):
+    conn = sqlite3.connect(archive)
+    try:
+        raw = packed = 0
+        for (blob,) in conn.execute("SELECT summary FROM articles WHERE summary IS NOT NULL"):
+            packed += len(blob)
+            raw += len(unpack_summary(blob).encode("utf-8"))
+        return raw, packed
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--articles", type=int, default=300000, help="articles seeded over 90 days")
+    parser.add_argument("--days", type=int, default=30, help="retention age")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per query, the best is reported")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="newshub-retention-")
+    seed_database(workdir, args.articles)
+
+    from personalnewsaggregator import setup_database
+
+    path = database.database_path()
+    conn, _ = setup_database()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    before = timed_queries(path, args.repeat)
+
+    start = time.perf_counter()
+    moved = archive_expired(conn, retention_policy({"days": args.days}, {}))
+    archived_in = time.perf_counter() - start
+    start = time.perf_counter()
+    vacuumed = incremental_vacuum(conn, None)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    vacuumed_in = time.perf_counter() - start
+    conn.close()
+    after = timed_queries(path, args.repeat)
+
+    mib = 1024 * 1024
+    archive = database.archive_path()
+    raw, packed = compression(archive)
+    print(f"{args.articles} articles over 90 days, retention {args.days} days")
+    print(f"archived {sum(moved.values())} articles in {archived_in:.1f}s "
+          f"({sum(moved.values()) / archived_in:,.0f}/s), vacuumed {vacuumed} pages in {vacuumed_in:.1f}s")
+    print(f"archive {os.path.getsize(archive) / mib:.1f} MiB; summaries {raw / mib:.1f} MiB -> "
+          f"{packed / mib:.1f} MiB compressed ({packed / raw:.0%})")
+    print(f"  {'':22} {'before':>10} {'after':>10}")
+    print(f"  {'live articles':22} {before[0]:10} {after[0]:10}")
+    print(f"  {'live database MiB':22} {before[1] / mib:10.1f} {after[1] / mib:10.1f}")
+    for name in before[2]:
+        print(f"  {name + ' ms':22} {before[2][name]:10.2f} {after[2][name]:10.2f}")
+    shutil.rmtree(workdir)
@@ -0,0 +1,156 @@
+"""Tag storage before and after the tags dictionary: size, tag pages and tag aggregates.
+
+Seeds a database like bench_web.py (three of 20 tags per article), rewrites it
+into the old layout (article_tags holding the tag text, indexed by
+(tag, article_id), and the stats_tag rollup), then measures:
+
+    size        article_tags and its index, from dbstat when SQLite has it, and the whole file
+    tag page    the dashboard's /tags/<tag> query, first page and a page 1000 rows in
+    aggregate   tag counts from scratch (GROUP BY over article_tags) and the popular-tags box
+    page tags   the tag names of a 50-article page
+
+It then opens the database with setup_database, which migrates it to the
+dictionary layout and vacuums, and measures again.
+
+Usage: python benchmarks/bench_tag_schema.py [--articles 200000] [--repeat 20]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_web import seed_database
+
+TAG = "Python"
+
+
+def to_legacy_layout(conn):
+    conn.executescript('''
+    BEGIN;
+    DROP TRIGGER tags_count_insert;
+    DROP TRIGGER tags_count_delete;
+    CREATE TABLE article_tags_legacy (
+        article_id INTEGER,
+        tag TEXT,
+        PRIMARY KEY (article_id, tag),
+        FOREIGN KEY (article_id) REFERENCES articles(id)
+    );
+    INSERT INTO article_tags_legacy (article_id, tag)
+        SELECT t.article_id, g.name FROM article_tags t JOIN tags g ON g.id = t.tag_id ORDER BY t.article_id;
+    DROP TABLE article_tags;
+    DROP TABLE tags;
+    ALTER TABLE article_tags_legacy RENAME TO article_tags;
+    CREATE INDEX idx_article_tags_tag ON article_tags (tag, article_id);
+    CREATE TABLE stats_tag (tag TEXT PRIMARY KEY, count INTEGER NOT NULL);
+    CREATE INDEX idx_stats_tag_count ON stats_tag (count);
+    INSERT INTO stats_tag (tag, count) SELECT tag, COUNT(*) FROM article_tags GROUP BY tag;
+    COMMIT;
+    ''')
+    conn.execute("VACUUM")
+
+
+def tag_storage(conn):
+    try:
+        rows = conn.execute('''
+            SELECT SUM(pgsize) FROM dbstat
+            WHERE name IN ('article_tags', 'idx_article_tags_tag', 'tags', 'idx_tags_article_count', 'stats_tag',
+                           'idx_stats_tag_count', 'sqlite_autoindex_article_tags_1', 'sqlite_autoindex_tags_1',
+                           'sqlite_autoindex_stats_tag_1')
+        ''').fetchone()
+        return rows[0]
+    except sqlite3.OperationalError:
+        return None  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+
+
+def timed(conn, query, params=(), repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def legacy_queries():
+    tags = "(SELECT GROUP_CONCAT(t.tag, ',') FROM article_tags t WHERE t.article_id = a.id)"
+    page = f'''
+        SELECT a.id, a.title, a.added_date, {tags} FROM articles a
+        WHERE a.id IN (SELECT t.article_id FROM article_tags t WHERE t.tag = ?) {{after}}
+        ORDER BY a.added_date DESC, a.id DESC LIMIT 51
+    '''
+    deep = "AND a.id < (SELECT article_id FROM article_tags WHERE tag = ? ORDER BY article_id DESC LIMIT 1 OFFSET 1000)"
+    return {
+        "tag page": (page.format(after=""), (TAG,)),
+        "tag page, 1000 in": (page.format(after=deep), (TAG, TAG)),
+        "aggregate from scratch": ("SELECT tag, COUNT(*) FROM article_tags GROUP BY tag", ()),
+        "popular tags": ("SELECT tag, count FROM stats_tag ORDER BY count DESC LIMIT 20", ()),
+        "page tags": (f"SELECT {tags} FROM articles a ORDER BY a.id DESC LIMIT 50", ()),
+    }
+
+
+def dictionary_queries():
+    tags = ("(SELECT GROUP_CONCAT(g.name, ',') FROM article_tags t JOIN tags g ON g.id = t.tag_id "
+            "WHERE t.article_id = a.id)")
+    page = f'''
+        SELECT a.id, a.title, a.added_date, {tags} FROM article_tags t2 JOIN articles a ON a.id = t2.article_id
+        WHERE t2.tag_id = (SELECT id FROM tags WHERE name = ?) {{after}}
+        ORDER BY t2.article_id DESC LIMIT 51
+    '''
+    deep = ("AND t2.article_id < (SELECT article_id FROM article_tags WHERE tag_id = "
+            "(SELECT id FROM tags WHERE name = ?) ORDER BY article_id DESC LIMIT 1 OFFSET 1000)")
+    return {
+        "tag page": (page.format(after=""), (TAG,)),
+        "tag page, 1000 in": (page.format(after=deep), (TAG, TAG)),
+        "aggregate from scratch": ("SELECT tag_id, COUNT(*) FROM article_tags GROUP BY tag_id", ()),
+        "popular tags": ("SELECT name, article_count FROM tags WHERE article_count > 0 "
+                         "ORDER BY article_count DESC LIMIT 20", ()),
+        "page tags": (f"SELECT {tags} FROM articles a ORDER BY a.id DESC LIMIT 50", ()),
+    }
+
+
+def measure(path, queries, repeat):
+    conn = sqlite3.connect(path)
+    try:
+        storage = tag_storage(conn)
+        results = {name: timed(conn, query, params, repeat) for name, (query, params) in queries.items()}
+    finally:
+        conn.close()
+    return os.path.getsize(path), storage, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--articles", type=int, default=200000, help="articles seeded")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per query, the best is reported")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="newshub-tags-")
+    seed_database(workdir, args.articles)
+    path = os.path.join(workdir, "news_aggregator.db")
+    conn = sqlite3.connect(path)
+    to_legacy_layout(conn)
+    conn.close()
+    legacy = measure(path, legacy_queries(), args.repeat)
+
+    from personalnewsaggregator import setup_database
+
+    start = time.perf_counter()
+    conn, _ = setup_database()
+    conn.close()
+    migrated_in = time.perf_counter() - start
+    dictionary = measure(path, dictionary_queries(), args.repeat)
+
+    mib = 1024 * 1024
+    print(f"{args.articles} articles, 3 tags each; migrated in {migrated_in:.1f}s")
+    print(f"  {'':24} {'text tags':>12} {'dictionary':>12}")
+    print(f"  {'database file MiB':24} {legacy[0] / mib:12.1f} {dictionary[0] / mib:12.1f}")
+    if legacy[1] is not None:
+        print(f"  {'tag tables+indexes MiB':24} {legacy[1] / mib:12.1f} {dictionary[1] / mib:12.1f}")
+    for name in legacy[2]:
+        print(f"  {name + ' ms':24} {legacy[2][name]:12.2f} {dictionary[2][name]:12.2f}")
+    shutil.rmtree(workdir)
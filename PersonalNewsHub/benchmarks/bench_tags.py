@@ -0,0 +1,66 @@
+"""Micro-benchmark: old per-term substring extract_tags vs the compiled TagExtractor.
+
+Usage: python benchmarks/bench_tags.py [num_texts] [vocabulary_size]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tagging import TagExtractor, load_vocabulary
+
+
+# The extract_tags implementation this replaced, parameterised on the vocabulary
+def legacy_extract_tags(text, tech_terms):
+    tags = []
+    text_lower = text.lower()
+    for term in tech_terms:
+        if term.lower() in text_lower:
+            tags.append(term)
+    tags.extend(re.findall(r'#(\w+)', text))
+    return list(set(tags))
+
+
+def synthetic_vocabulary(size, rng):
+    base = load_vocabulary()
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    extra = {"".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)}
+    return (base + sorted(extra))[:size]
+
+
+def synthetic_texts(n, vocabulary, rng):
+    words = ["the", "said", "new", "release", "HTML", "model", "startup", "funding", "open", "source"]
+    texts = []
+    for _ in range(n):
+        parts = [rng.choice(words) for _ in range(40)] + [rng.choice(vocabulary) for _ in range(3)]
+        rng.shuffle(parts)
+        texts.append(" ".join(parts))
+    return texts
+
+
+def timed(label, fn, texts):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>24} {len(texts) / elapsed:>12,.0f} texts/sec")
+
+
+if __name__ == "__main__":
+    num_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sizes = [int(sys.argv[2])] if len(sys.argv) > 2 else [len(load_vocabulary()), 1000, 5000]
+    rng = random.Random(42)
+
+    for size in sizes:
+        vocabulary = synthetic_vocabulary(size, rng)
+        texts = synthetic_texts(num_texts, vocabulary, rng)
+        start = time.perf_counter()
+        extractor = TagExtractor(vocabulary)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        print(f"vocabulary={len(vocabulary)} terms (compile {compile_ms:.1f} ms)")
+        timed("legacy extract_tags", lambda text: legacy_extract_tags(text, vocabulary), texts)
+        timed("TagExtractor", extractor.extract, texts)
@@ -0,0 +1,185 @@
+"""Flask route latency under concurrent load at 10k, 100k and 1M articles.
+
+For each size, seeds a scratch database with synthetic articles (spread over
+90 days, with sources, categories and three tags each) through the normal
+schema and triggers, serves webinterface.app from a threaded WSGI server in a
+separate process, and has ``--clients`` threads request each route for
+``--duration`` seconds. "cached" repeats one URL, so after the first request
+pages come from the response cache; "uncached" adds a unique, ignored query
+parameter so every request renders. /api/articles streams and is never cached.
+
+Seeded databases are kept under ``--keep DIR`` and reused by later runs.
+
+Usage: python benchmarks/bench_web.py [sizes...] [--clients 8] [--duration 5] [--keep DIR]
+       (default sizes: 10000 100000 1000000; seeding 1M articles takes minutes and ~1.3 GB)
+"""
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import requests
+
+from ingest import set_high_water
+
+ROUTES = [
+    ("home", "/", True),
+    ("category, 30 days", "/?days=30&category=AI", True),
+    ("search", "/?search=rust&days=90", True),
+    ("tag page", "/tags/Python", True),
+    ("api, 100 rows", "/api/articles?limit=100", False),
+]
+
+WORDS = ("open source model python rust startup cloud security release benchmark compiler database "
+         "kubernetes privacy gpu inference llm research funding browser linux apple google agent "
+         "framework vulnerability chip robotics quantum web api developer tooling").split()
+TAGS = ["AI", "Python", "Rust", "Security", "Cloud", "Startups", "Linux", "GPU", "Privacy", "Research",
+        "JavaScript", "Go", "Databases", "Open Source", "Apple", "Google", "LLM", "DevOps", "Hardware", "Web"]
+SOURCES = [("HackerNews", "Tech"), ("Reddit/r/programming", "AI"), ("Reddit/r/MachineLearning", "AI"),
+           ("ArXiv", "Research"), ("TechCrunch", "Tech News"), ("Wired", "Tech News"),
+           ("MIT Technology Review", "Tech News"), ("Dev.to", "Programming")]
+
+
+def seed_database(directory, size, batch=50000):
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+    if os.path.exists("news_aggregator.db"):
+        return 0.0
+
+    from personalnewsaggregator import setup_database
+
+    start = time.perf_counter()
+    conn, cursor = setup_database()
+    conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)", enumerate(TAGS, 1))
+    rng = random.Random(size)
+    now = datetime.now()
+    for offset in range(0, size, batch):
+        articles, tags = [], []
+        for n in range(offset, min(size, offset + batch)):
+            # Oldest first, like real ingestion, so added_date grows with id
+            added = (now - timedelta(days=90 * (size - n) / size)).strftime("%Y-%m-%d %H:%M:%S")
+            source, category = rng.choice(SOURCES)
+            # Each article is its own story, as cluster_articles leaves anything without a near-duplicate
+            articles.append((n + 1, " ".join(rng.choices(WORDS, k=8)).capitalize(),
+                             f"https://site{n % 997}.example.com/story/{n}", source, added,
+                             " ".join(rng.choices(WORDS, k=40)), category, added, n + 1))
+            tags.extend((n + 1, tag_id) for tag_id in rng.sample(range(1, len(TAGS) + 1), 3))
+        conn.executemany(
+            "INSERT INTO articles (id, title, url, source, published_date, summary, category, added_date, cluster_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", articles)
+        conn.executemany("INSERT INTO article_tags (article_id, tag_id) VALUES (?, ?)", tags)
+        set_high_water(conn, articles[-1][0])  # Already clustered, as ingestion leaves them
+        conn.commit()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def serve(directory, port):
+    os.chdir(directory)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # No access log line per request
+    from werkzeug.serving import make_server
+
+    import webinterface
+    make_server("127.0.0.1", port, webinterface.app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(base_url + "/metrics", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Web app did not start on {base_url}")
+
+
+def load(url_for, clients, duration):
+    latencies, errors = [], []
+    start = time.monotonic()
+    deadline = start + duration
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.get(url_for())
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            (latencies if ok else errors).append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests started before the deadline may finish after it
+    return sorted(latencies), len(errors), time.monotonic() - start
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def bench_size(directory, size, clients, duration):
+    seconds = seed_database(directory, size)
+    db_size = os.path.getsize(os.path.join(directory, "news_aggregator.db")) / 1024 / 1024
+    seeded = f"seeded in {seconds:.1f}s" if seconds else "reused"
+    print(f"\n{size} articles ({db_size:.0f} MiB database, {seeded})")
+    print(f"  {'route':20} {'mode':9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(directory, port), daemon=True)
+    server.start()
+    try:
+        wait_until_up(base_url)
+        counter = itertools.count()
+        for label, path, cacheable in ROUTES:
+            for mode in ("cached", "uncached") if cacheable else ("streamed",):
+                if mode == "uncached":
+                    separator = "&" if "?" in path else "?"
+                    url_for = lambda: f"{base_url}{path}{separator}_={next(counter)}"
+                else:
+                    url_for = lambda: base_url + path
+                latencies, errors, elapsed = load(url_for, clients, duration)
+                print(f"  {label:20} {mode:9} {len(latencies) / elapsed:8.1f} "
+                      f"{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.95) * 1000:8.1f} "
+                      f"{percentile(latencies, 0.99) * 1000:8.1f} {errors:7}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[10000, 100000, 1000000])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per route and mode")
+    parser.add_argument("--keep", help="directory for the seeded databases (default: a scratch dir)")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.keep or tempfile.mkdtemp(prefix="newshub-web-"))
+    print(f"{args.clients} clients, {args.duration:.0f}s per route, {os.cpu_count()} CPUs, databases in {root}")
+    for size in args.sizes:
+        bench_size(os.path.join(root, f"articles-{size}"), size, args.clients, args.duration)
@@ -0,0 +1,59 @@
+"""EXPLAIN QUERY PLAN regression check for the dashboard queries.
+
+Builds a scratch database with the real schema and fails (exit code 1) if
+any dashboard query falls back to a full scan of ``articles`` or
+``article_tags`` instead of using an index.
+
+Usage: python benchmarks/check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from personalnewsaggregator import setup_database
+from webinterface import build_article_query
+
+
+# A bare "SCAN a" / "SCAN articles" means a full table scan; SCAN ... USING INDEX is fine
+FULL_SCAN = re.compile(r"^SCAN (a|t|t2|articles|article_tags)\b(?!.*USING (COVERING )?INDEX)")
+
+
+def dashboard_queries():
+    yield "index (days)", build_article_query(7, collapse_stories=True)
+    yield "index (category)", build_article_query(7, category="Tech", collapse_stories=True)
+    yield "index (source)", build_article_query(7, source="HackerNews")
+    yield "index (category + source)", build_article_query(30, category="Tech", source="HackerNews")
+    yield "index (search)", build_article_query(7, search="python")
+    yield "index (next page)", build_article_query(7, after=("2024-01-01 00:00:00", 100))
+    yield "tag view", build_article_query(tag_id=1)
+    yield "tag view (next page)", build_article_query(tag_id=1, after=("2024-01-01 00:00:00", 100))
+
+
+def check(cursor):
+    failures = []
+    for name, (query, params) in dashboard_queries():
+        plan = [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + query, params)]
+        scans = [step for step in plan if FULL_SCAN.search(step)]
+        status = "FAIL" if scans else "ok"
+        print(f"[{status}] {name}")
+        for step in plan:
+            print(f"       {step}")
+        if scans:
+            failures.append(name)
+    return failures
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        conn, cursor = setup_database()
+        failures = check(cursor)
+        conn.close()
+
+    if failures:
+        print(f"Full table scans in: {', '.join(failures)}")
+        sys.exit(1)
+    print("All dashboard queries use indexes")
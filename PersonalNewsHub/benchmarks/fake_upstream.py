@@ -0,0 +1,242 @@
+"""Local stand-in for HackerNews, Reddit, arXiv and RSS feeds, replaying benchmarks/fixtures.
+
+Routes:
+    /hn/, /hn/news?p=N          hn_frontpage.html (each page's links made distinct)
+    /reddit/r/<subs>/new.json   reddit_new.json, paged by ?limit= and ?after=
+    /arxiv/api/query            arxiv_query.xml, sliced by ?start= and ?max_results=
+    /rss/<n>.xml                rss_feed.xml, links made distinct per feed number
+
+``latency`` (seconds) delays every response. ``scale`` repeats the items of
+the Reddit, arXiv and RSS fixtures that many times with distinct URLs to
+grow the payload; HackerNews pages stay at 30 rows like the real site. Every
+response carries an ETag and a matching If-None-Match gets a 304, unless
+``validators`` is off.
+
+The fixtures are stand-ins captured in each upstream's wire format; replace
+a file with a real recording to replay it instead.
+
+Usage: python benchmarks/fake_upstream.py [--port 8765] [--latency 0.05] [--scale 4] [--no-validators]
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SUBREDDITS = ["ArtificialInteligence", "programming", "MachineLearning"]
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def with_param(url, param, xml=True):
+    # Append a query parameter; it survives dedup.url_key, so the URL counts as a different article
+    if "?" not in url:
+        return f"{url}?{param}"
+    return url + ("&amp;" if xml else "&") + param
+
+
+def split_items(document, tag):
+    """Split an XML document into (head, [item blocks], tail) around every <tag>...</tag>."""
+    blocks = [match.group(0) for match in re.finditer(rf"<{tag}>.*?</{tag}>", document, re.S)]
+    head = document[:document.index(blocks[0])]
+    tail = document[document.rindex(blocks[-1]) + len(blocks[-1]):]
+    return head, blocks, tail
+
+
+def rewrite_element(block, tag, param):
+    return re.sub(rf"<{tag}>([^<]+)</{tag}>",
+                  lambda match: f"<{tag}>{with_param(match.group(1), param)}</{tag}>", block)
+
+
+class FakeUpstream:
+    """Threaded HTTP server on localhost serving the fixtures; use as a context manager."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, scale=1, validators=True):
+        self.latency = latency
+        self.scale = scale
+        self.validators = validators
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+        self._hn = read_fixture("hn_frontpage.html")
+        self._reddit = json.loads(read_fixture("reddit_new.json"))
+        self._posts = [
+            self._copy_post(child, k) for k in range(scale) for child in self._reddit["data"]["children"]
+        ]
+        self._rss = split_items(read_fixture("rss_feed.xml"), "item")
+        head, entries, tail = split_items(read_fixture("arxiv_query.xml"), "entry")
+        self._arxiv = head, [rewrite_element(entry, "id", f"copy={k}") if k else entry
+                             for k in range(scale) for entry in entries], tail
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def _copy_post(child, k):
+        if not k:
+            return child
+        child = copy.deepcopy(child)
+        child["data"]["name"] += f"c{k}"
+        child["data"]["url"] = with_param(child["data"]["url"], f"copy={k}", xml=False)
+        return child
+
+    # Response bodies, built once per distinct request and then replayed
+    def body(self, path, query):
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        with self._lock:
+            cached = self._bodies.get(key)
+        if cached is None:
+            cached = self._render(path, query)
+            with self._lock:
+                self._bodies[key] = cached
+        return cached
+
+    def _render(self, path, query):
+        def arg(name, default):
+            return int(query.get(name, [default])[0])
+
+        if path in ("/hn/", "/hn/news"):
+            page = arg("p", 1)
+            if page == 1:
+                return "text/html; charset=utf-8", self._hn.encode()
+            html = re.sub(r'(class="titleline"><a href=")([^"]+)',
+                          lambda m: m.group(1) + with_param(m.group(2), f"page={page}", xml=False), self._hn)
+            return "text/html; charset=utf-8", html.encode()
+
+        if path.startswith("/reddit/r/") and path.endswith(".json"):
+            after = query.get("after", [None])[0]
+            limit = arg("limit", 25)
+            names = [post["data"]["name"] for post in self._posts]
+            start = names.index(after) + 1 if after in names else 0
+            page = self._posts[start:start + limit]
+            more = start + limit < len(self._posts)
+            listing = dict(self._reddit, data=dict(self._reddit["data"], children=page, dist=len(page),
+                                                   after=page[-1]["data"]["name"] if page and more else None))
+            return "application/json; charset=UTF-8", json.dumps(listing).encode()
+
+        if path == "/arxiv/api/query":
+            head, entries, tail = self._arxiv
+            start = arg("start", 0)
+            page = entries[start:start + arg("max_results", 10)]
+            return "application/atom+xml; charset=utf-8", (head + "\n".join(page) + tail).encode()
+
+        match = re.fullmatch(r"/rss/(\d+)\.xml", path)
+        if match:
+            feed = int(match.group(1))
+            head, items, tail = self._rss
+            items = [rewrite_element(rewrite_element(item, "link", f"feed={feed}&amp;copy={k}"), "guid", f"feed={feed}")
+                     for k in range(self.scale) for item in items]
+            return "application/rss+xml; charset=UTF-8", (head + "\n".join(items) + tail).encode()
+
+        return None
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+                parts = urlsplit(self.path)
+                found = upstream.body(parts.path, parse_qs(parts.query))
+                if found is None:
+                    self.send_error(404)
+                    return
+
+                content_type, body = found
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                not_modified = upstream.validators and self.headers.get("If-None-Match") == etag
+                with upstream._lock:
+                    upstream.requests += 1
+                    upstream.not_modified += not_modified
+                    upstream.bytes_sent += 0 if not_modified else len(body)
+
+                self.send_response(304 if not_modified else 200)
+                if upstream.validators:
+                    self.send_header("ETag", etag)
+                if not_modified:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def sources_config(self, rss_feeds=4):
+        """sources.toml text for every source type, pointed at this server."""
+        items = 20 * self.scale  # Items per RSS feed and arXiv query in the fixtures
+        entries = [
+            f'type = "hackernews"\nname = "HackerNews"\nurl = "{self.url}/hn/"\ncategory = "Tech"\nlimit = 30',
+            f'type = "reddit"\nname = "Reddit"\nurl = "{self.url}/reddit"\ncategory = "AI"\n'
+            f'subreddits = {json.dumps(SUBREDDITS)}',
+            f'type = "arxiv"\nname = "ArXiv"\nurl = "{self.url}/arxiv/api/query"\ncategory = "Research"\n'
+            f'max_papers = {min(items, 100)}',  # One page, so no rate-limit pause
+        ]
+        entries += [
+            f'type = "rss"\nname = "Feed {n}"\nurl = "{self.url}/rss/{n}.xml"\ncategory = "Tech News"\nlimit = {items}'
+            for n in range(rss_feeds)
+        ]
+        return "".join(f"[[source]]\n{entry}\n\n" for entry in entries)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the recorded fixtures as a fake upstream")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--scale", type=int, default=1, help="repeat each fixture's items this many times")
+    parser.add_argument("--no-validators", action="store_true", help="never send ETags or 304s")
+    parser.add_argument("--feeds", type=int, default=4, help="RSS feeds in the printed sources config")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(port=args.port, latency=args.latency, scale=args.scale, validators=not args.no_validators)
+    print(upstream.sources_config(args.feeds))
+    print(f"Serving fixtures on {upstream.url} (Ctrl+C to stop)")
+    try:
+        upstream.serve_forever()
+    except KeyboardInterrupt:
+        pass
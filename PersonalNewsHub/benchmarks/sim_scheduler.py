@@ -0,0 +1,89 @@
+"""Simulated week of polling: fixed 6-hour cycle vs the adaptive scheduler.
+
+Each source publishes items as a Poisson process at its own rate, and a
+poll only sees the newest ``window`` items, like a front page or feed. For
+both policies the script reports requests made, items delivered,
+requests per 100 delivered items, how long items waited before being
+fetched, and items lost because they scrolled out of the window between
+polls. Runs offline, using scheduler.next_interval itself.
+
+Usage: python benchmarks/sim_scheduler.py
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scheduler import DEFAULT_INTERVAL, jittered, next_interval, source_policy
+from sources import load_sources
+
+WEEK = 7 * 24 * 60 * 60
+FIXED_INTERVAL = 6 * 60 * 60
+
+# name: (items per hour, items visible per poll)
+SOURCES = {
+    "HackerNews": (12.0, 30),
+    "Reddit": (6.0, 100),
+    "ArXiv": (2.0, 20),
+    "TechCrunch": (1.5, 15),
+    "Wired": (0.8, 15),
+    "MIT Technology Review": (0.15, 15),
+    "Dev.to": (4.0, 15)
+}
+
+
+def publish_times(rate, rng):
+    times, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate / 3600)
+        if t > WEEK:
+            return times
+        times.append(t)
+
+
+def simulate(policy, items, window, adaptive):
+    requests, waits, lost = 0, [], 0
+    interval = DEFAULT_INTERVAL if adaptive else FIXED_INTERVAL
+    now, fetched_until = 0.0, 0
+    while now < WEEK:
+        requests += 1
+        published = fetched_until
+        while published < len(items) and items[published] <= now:
+            published += 1
+        new = published - fetched_until
+        visible = min(new, window)
+        lost += new - visible
+        waits.extend(now - t for t in items[published - visible:published])
+        fetched_until = published
+        if adaptive:
+            interval = next_interval(interval, visible, policy)
+            now += jittered(interval)
+        else:
+            now += interval
+    return requests, waits, lost
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    # Poll bounds and targets come from sources.toml
+    policies = {source.name: source_policy(source.policy()) for source in load_sources()}
+    totals = {False: [0, [], 0], True: [0, [], 0]}
+
+    def report(name, adaptive, requests, waits, lost):
+        mean_wait = sum(waits) / len(waits) / 60 if waits else 0
+        per_100 = requests / len(waits) * 100 if waits else 0
+        print(f"{name:<24}{'adaptive' if adaptive else 'fixed':<10}{requests:>9}{len(waits):>10}"
+              f"{per_100:>9.1f}{mean_wait:>9.0f} m{lost:>6}")
+
+    print(f"{'source':<24}{'policy':<10}{'requests':>9}{'delivered':>10}{'req/100':>9}{'mean wait':>11}{'lost':>6}")
+    for name, (rate, window) in SOURCES.items():
+        items = publish_times(rate, rng)
+        for adaptive in (False, True):
+            requests, waits, lost = simulate(policies.get(name, source_policy()), items, window, adaptive)
+            report(name, adaptive, requests, waits, lost)
+            totals[adaptive][0] += requests
+            totals[adaptive][1].extend(waits)
+            totals[adaptive][2] += lost
+    for adaptive in (False, True):
+        report("total", adaptive, *totals[adaptive])
@@ -0,0 +1,185 @@
+import hashlib
+import operator
+import re
+from array import array
+
+from ingest import bump_data_version
+
+
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard similarity almost always share a bucket
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Titles that differ in one word of a template ("Python 3.13 released" / "3.12",
+# "Show HN: I built a terminal UI for Postgres" / "for Kubernetes") stay below
+# 0.8 on word bigrams, and a 64-hash estimate is within about 0.05 of that;
+# cross-posts of one story normalize to the same title (see benchmarks/bench_clustering.py)
+SIMILARITY_THRESHOLD = 0.9
+WINDOW_DAYS = 30
+# Bumped whenever shingles() changes; setup_database then re-clusters the window (see recluster_window)
+SIGNATURE_VERSION = 2
+
+# Each salt turns one blake2b call into 16 independent 32-bit hash functions
+_SALTS = [bytes([i]) * 16 for i in range(NUM_PERM // 16)]
+
+# Version numbers and names like "3.13", "gpt-5" or "node.js" stay one word
+_WORD_PATTERN = re.compile(r"\w+(?:[.\-]\w+)*")
+# Trailing markers HN adds to a submitted title: "(2024)", "[pdf]", "[video]"
+_MARKER_PATTERN = re.compile(r"\s*[\[(](?:pdf|video|\d{4})[\])]\s*$", re.IGNORECASE)
+
+
+def shingles(title):
+    # Word bigrams of the normalized title: a changed version number or name
+    # breaks two of a short title's few shingles. Summaries are left out, as
+    # most sources have none and one would only dilute a matching title.
+    words = _WORD_PATTERN.findall(_MARKER_PATTERN.sub("", title).lower())
+    if len(words) < 2:
+        return set(words)
+    return {f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1)}
+
+
+def _hashes(shingle):
+    data = shingle.encode("utf-8")
+    return array("I", b"".join(hashlib.blake2b(data, digest_size=64, salt=salt).digest() for salt in _SALTS))
+
+
+def signature(title):
+    """MinHash signature (NUM_PERM 32-bit ints) of an article title, or None if it has no shingles."""
+    rows = [_hashes(shingle) for shingle in shingles(title)]
+    if not rows:
+        return None
+    # Column-wise minimum over all shingles: one min per hash function
+    return array("I", map(min, zip(*rows)))
+
+
+def band_buckets(sig):
+    # One stable signed 64-bit bucket id per band, so it fits an SQLite INTEGER
+    buckets = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+        buckets.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True))
+    return buckets
+
+
+def similarity(sig_a, sig_b):
+    return sum(map(operator.eq, sig_a, sig_b)) / NUM_PERM
+
+
+def _find_match(cursor, sig, buckets, window_days):
+    # Joining from the VALUES list lets SQLite seek the (band, bucket) key instead of scanning
+    pairs = ",".join("(?, ?)" for _ in buckets)
+    params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+    cursor.execute(f'''
+    SELECT a.id, a.cluster_id, m.signature
+    FROM articles a
+    JOIN article_minhash m ON m.article_id = a.id
+    WHERE a.id IN (
+        SELECT l.article_id FROM (VALUES {pairs}) v
+        JOIN lsh_buckets l ON l.band = v.column1 AND l.bucket = v.column2
+    )
+      AND a.added_date >= DATE('now', ?)
+    ''', params + [f"-{window_days} days"])
+
+    best, best_score = None, SIMILARITY_THRESHOLD
+    for article_id, cluster_id, blob in cursor.fetchall():
+        score = similarity(sig, array("I", blob))
+        if score >= best_score:
+            best, best_score = (article_id, cluster_id), score
+    return best
+
+
+def cluster_articles(conn, records, window_days=WINDOW_DAYS):
+    """Assign a cluster_id to freshly inserted articles (dicts with id and title).
+
+    Each article's MinHash bands are looked up in lsh_buckets to find
+    candidate duplicates from the last ``window_days``. Candidates are
+    confirmed by signature similarity. A match joins the existing cluster;
+    anything else starts its own cluster, keyed by its own id. Returns the
+    number of articles that joined an existing cluster.
+    """
+    cursor = conn.cursor()
+    joined = 0
+    for record in records:
+        sig = signature(record["title"])
+        cluster_id = record["id"]
+
+        if sig is not None:
+            buckets = band_buckets(sig)
+            match = _find_match(cursor, sig, buckets, window_days)
+            if match is not None:
+                match_id, match_cluster = match
+                if match_cluster is None:
+                    cursor.execute("UPDATE articles SET cluster_id = id WHERE id = ?", (match_id,))
+                cluster_id = match_cluster or match_id
+                joined += 1
+
+            cursor.execute(
+                "INSERT OR REPLACE INTO article_minhash (article_id, signature) VALUES (?, ?)",
+                (record["id"], sig.tobytes())
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (band, bucket, article_id) VALUES (?, ?, ?)",
+                [(band, bucket, record["id"]) for band, bucket in enumerate(buckets)]
+            )
+
+        cursor.execute("UPDATE articles SET cluster_id = ? WHERE id = ?", (cluster_id, record["id"]))
+
+    if joined:
+        bump_data_version(cursor)  # Cached pages still show the duplicates as separate cards
+    conn.commit()
+    return joined
+
+
+def prune_signatures(conn, window_days=WINDOW_DAYS):
+    # Articles older than the window are never candidates again; ids grow with added_date
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(id) FROM articles WHERE added_date >= DATE('now', ?)", (f"-{window_days} days",))
+    oldest = cursor.fetchone()[0]
+    if oldest is None:
+        return
+    cursor.execute("DELETE FROM lsh_buckets WHERE article_id < ?", (oldest,))
+    cursor.execute("DELETE FROM article_minhash WHERE article_id < ?", (oldest,))
+    conn.commit()
+
+
+def cluster_backfill(conn, window_days=WINDOW_DAYS, batch_size=1000):
+    """Cluster every article in the window that has no signature yet, oldest first."""
+    cursor = conn.cursor()
+    last_id, total = 0, 0
+    while True:
+        cursor.execute('''
+        SELECT a.id, a.title FROM articles a
+        WHERE a.id > ? AND a.added_date >= DATE('now', ?)
+          AND NOT EXISTS (SELECT 1 FROM article_minhash m WHERE m.article_id = a.id)
+        ORDER BY a.id LIMIT ?
+        ''', (last_id, f"-{window_days} days", batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return total
+        total += cluster_articles(conn, [{"id": r[0], "title": r[1]} for r in rows], window_days)
+        last_id = rows[-1][0]
+
+
+def signature_version(conn):
+    row = conn.execute("SELECT value FROM app_state WHERE key = 'signature_version'").fetchone()
+    return row[0] if row else None
+
+
+def recluster_window(conn, window_days=WINDOW_DAYS):
+    """Drop every stored signature and cluster the window again with the current shingles.
+
+    Signatures from another SIGNATURE_VERSION can't be compared with new ones,
+    and clusters they formed may join different stories, so the window's
+    articles start over as unclustered. The version is recorded last, so an
+    interrupted run starts over on the next setup. Returns the number joined.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM lsh_buckets")
+    cursor.execute("DELETE FROM article_minhash")
+    cursor.execute("UPDATE articles SET cluster_id = NULL WHERE added_date >= DATE('now', ?)", (f"-{window_days} days",))
+    bump_data_version(cursor)
+    conn.commit()
+    joined = cluster_backfill(conn, window_days)
+    cursor.execute("INSERT OR REPLACE INTO app_state (key, value) VALUES ('signature_version', ?)", (SIGNATURE_VERSION,))
+    conn.commit()
+    return joined
@@ -0,0 +1,120 @@
+"""SQLite connections shared by the fetcher and the web app.
+
+The database runs in WAL mode: readers see the last committed state and
+never wait for an ingestion transaction, and the writer never waits for
+readers. The fetcher opens one writer connection with ``connect_writer``
+and is the only process that writes. The web app borrows read-only
+connections from a ReaderPool, so a request neither opens a new connection
+nor can take a write lock by accident.
+
+The database file is ``news_aggregator.db`` in the working directory unless
+the NEWSHUB_DB environment variable names another path. Articles moved out
+by retention.py go to an archive database next to it (NEWSHUB_ARCHIVE
+overrides its path).
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+DEFAULT_DB_PATH = "news_aggregator.db"
+
+# Applied to every connection. synchronous=NORMAL is durable across application
+# crashes in WAL mode and only fsyncs at checkpoints; cache_size is in KiB when negative.
+PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# How long a connection waits on another process's lock before "database is locked"
+BUSY_TIMEOUT = 10.0
+
+
+def database_path():
+    return os.environ.get("NEWSHUB_DB") or DEFAULT_DB_PATH
+
+
+def archive_path():
+    return os.environ.get("NEWSHUB_ARCHIVE") or os.path.splitext(database_path())[0] + "_archive.db"
+
+
+def apply_pragmas(conn):
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect_writer(path=None):
+    """The read-write connection ingestion uses; switches the database to WAL on first use."""
+    conn = sqlite3.connect(path or database_path(), timeout=BUSY_TIMEOUT)
+    # Only takes effect on a new file, and must come before WAL writes its header;
+    # setup_database converts older databases with a VACUUM
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # Persistent: stored in the file, so readers opened later find it in WAL mode too
+    conn.execute("PRAGMA journal_mode = WAL")
+    apply_pragmas(conn)
+    return conn
+
+
+def connect_reader(path=None, factory=sqlite3.Connection):
+    """A read-only connection that may be handed between threads (one at a time)."""
+    uri = "file:" + quote(os.path.abspath(path or database_path())) + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False, factory=factory)
+    apply_pragmas(conn)
+    return conn
+
+
+class ReaderPool:
+    """Thread-safe pool of at most ``size`` read-only connections.
+
+    ``acquire`` returns an idle connection, opens a new one while fewer than
+    ``size`` exist, or waits for one to be released. Connections are created
+    with ``factory`` (e.g. a timing subclass) and stay open for the life of
+    the pool.
+    """
+
+    def __init__(self, path=None, size=8, factory=sqlite3.Connection):
+        self.path = path
+        self.size = size
+        self.factory = factory
+        self._idle = queue.LifoQueue()  # Most recently used first, its page cache is warm
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout=None):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection free after {timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return connect_reader(self.path, self.factory)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            # The base close, in case the factory's close() returns connections to the pool
+            sqlite3.Connection.close(conn)
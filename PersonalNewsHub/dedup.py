@@ -0,0 +1,147 @@
+import hashlib
+import math
+from urllib.parse import urlsplit, urlunsplit
+
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "cmpid", "ocid", "_ga"
+}
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def _is_route(fragment):
+    # Single-page apps route on the fragment (#/post/5, #!/post/5); anything else is an in-page anchor
+    return fragment.startswith(("/", "!"))
+
+
+def _strip_tracking(query):
+    # Works on the raw "k=v" pieces so everything else keeps its exact bytes and order
+    return "&".join(p for p in query.split("&") if p and not _is_tracking(p.partition("=")[0]))
+
+
+def clean_url(url):
+    """Drop tracking parameters and in-page anchors, leaving a URL that still opens the same page."""
+    parts = urlsplit(url.strip())
+    fragment = parts.fragment if _is_route(parts.fragment) else ""
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, _strip_tracking(parts.query), fragment))
+
+
+def url_key(url):
+    """Canonical identity of a URL for duplicate detection.
+
+    Ignores scheme, a leading ``www.``, host case, trailing slashes, tracking
+    parameters, parameter order and in-page anchors (route fragments such as
+    ``#/post/5`` are kept), so one story linked from
+    HackerNews, Reddit and an RSS feed maps to the same key. Plain string
+    splitting keeps this cheap enough to warm the filter with millions of URLs.
+    """
+    url = url.strip()
+    scheme_end = url.find("://")
+    rest = url[scheme_end + 3:] if scheme_end != -1 else url
+    rest, _, fragment = rest.partition("#")
+    base, _, query = rest.partition("?")
+    host, _, path = base.partition("/")
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    key = host + "/" + path.rstrip("/")
+    if query:
+        params = sorted(p for p in query.split("&") if p and not _is_tracking(p.partition("=")[0]))
+        if params:
+            key += "?" + "&".join(params)
+    if _is_route(fragment):
+        key += "#" + fragment
+    return key
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for ``capacity`` items at ``error_rate``."""
+
+    def __init__(self, capacity, error_rate=1e-6):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest generate all k positions
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def false_positive_rate(self):
+        # Expected rate for the number of items added so far
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class UrlDedup:
+    """In-memory "already seen" check on canonical URL keys, run before any DB work.
+
+    A Bloom filter never misses a URL it has seen; a false positive means a
+    genuinely new article is skipped, at ``error_rate`` odds. The filter is
+    rebuilt from the database once it holds more than its capacity.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=1e-6):
+        self.filter = BloomFilter(capacity, error_rate)
+
+    @classmethod
+    def from_db(cls, cursor, error_rate=1e-6):
+        cursor.execute("SELECT COUNT(*) FROM articles")
+        existing = cursor.fetchone()[0]
+        dedup = cls(max(1_000_000, existing * 2), error_rate)
+        cursor.execute("SELECT url FROM articles")
+        for (url,) in cursor:
+            dedup.filter.add(url_key(url))
+        return dedup
+
+    def __contains__(self, url):
+        return url_key(url) in self.filter
+
+    def filter_new(self, records):
+        """Return records whose URL has not been seen, marking them as seen.
+
+        Also collapses duplicates inside the batch itself.
+        """
+        fresh = []
+        for record in records:
+            key = url_key(record["url"])
+            if key in self.filter:
+                continue
+            self.filter.add(key)
+            fresh.append(record)
+        return fresh
+
+    @property
+    def full(self):
+        return self.filter.count > self.filter.capacity
+
+    def report(self):
+        return {
+            "urls": self.filter.count,
+            "capacity": self.filter.capacity,
+            "memory_bytes": self.filter.memory_bytes,
+            "false_positive_rate": self.filter.false_positive_rate()
+        }
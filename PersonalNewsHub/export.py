@@ -0,0 +1,96 @@
+import gzip
+import json
+import os
+import tempfile
+import textwrap
+from datetime import datetime, timedelta
+
+from ingest import TAGS_SQL
+
+
+# Yield recent articles one dict at a time straight from the cursor
+def iter_recent_news(cursor, days=7, limit=50):
+    cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    cursor.execute(f'''
+    SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category,
+           {TAGS_SQL} as tags
+    FROM articles a
+    WHERE a.added_date >= ?
+    ORDER BY a.added_date DESC, a.id DESC
+    LIMIT ?
+    ''', (cutoff_date, limit))
+
+    for row in cursor:
+        yield {
+            "id": row[0],
+            "title": row[1],
+            "url": row[2],
+            "source": row[3],
+            "published_date": row[4],
+            "summary": row[5],
+            "category": row[6],
+            "tags": row[7].split(',') if row[7] else []
+        }
+
+
+def write_json_array(f, items, compact=False):
+    """Stream ``items`` to ``f`` as a JSON array, byte-for-byte like json.dump.
+
+    ``compact`` drops all whitespace, otherwise the output matches
+    ``json.dump(items, f, indent=2)``.
+    """
+    first = True
+    f.write("[")
+    for item in items:
+        if compact:
+            f.write(("" if first else ",") + json.dumps(item, separators=(",", ":")))
+        else:
+            f.write(("\n" if first else ",\n") + textwrap.indent(json.dumps(item, indent=2), "  "))
+        first = False
+    f.write("]" if compact or first else "\n]")
+
+
+def _last_export_id(cursor, key):
+    cursor.execute("SELECT value FROM app_state WHERE key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def export_recent_news(conn, path="recent_news.json", days=7, limit=50, compact=False, use_gzip=False, force=False):
+    """Write recent articles to ``path`` atomically, skipping unchanged cycles.
+
+    The file is streamed into a temp file in the same directory and renamed
+    over ``path``, so readers never see a partial file. When the newest
+    article id matches the one recorded at the last export, the rewrite is
+    skipped. Returns True if the file was written.
+    """
+    cursor = conn.cursor()
+    state_key = f"export_max_id:{os.path.abspath(path)}"
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM articles")
+    max_id = cursor.fetchone()[0]
+    if not force and os.path.exists(path) and _last_export_id(cursor, state_key) == max_id:
+        return False
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".recent_news-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if use_gzip:
+                with gzip.open(raw, "wt", encoding="utf-8") as f:
+                    write_json_array(f, iter_recent_news(cursor, days, limit), compact)
+            else:
+                with open(raw.fileno(), "w", encoding="utf-8", closefd=False) as f:
+                    write_json_array(f, iter_recent_news(cursor, days, limit), compact)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    cursor.execute("INSERT OR REPLACE INTO app_state (key, value) VALUES (?, ?)", (state_key, max_id))
+    conn.commit()
+    return True
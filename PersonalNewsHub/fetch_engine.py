@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Overall worker threads and simultaneous requests allowed against one host
+MAX_WORKERS = 16
+PER_HOST_CONCURRENCY = 2
+REQUEST_TIMEOUT = 30
+
+
+class FetchEngine:
+    """Runs source fetchers concurrently over pooled keep-alive sessions.
+
+    Every host gets its own ``requests.Session`` so TCP/TLS connections are
+    reused between requests, and a semaphore so no host sees more than
+    ``per_host`` requests at once. Results are handed back to the calling
+    thread, which stays the only one touching the database.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, per_host=PER_HOST_CONCURRENCY, timeout=REQUEST_TIMEOUT,
+                 validators=None, dedup=None, parse_pool=None):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        # url -> {"etag", "last_modified", "content_length"}, see load_validators
+        self.validators = validators if validators is not None else {}
+        # source -> {url: validators} from its running fetch, kept only once its records are stored
+        self.pending_validators = {}
+        # Optional dedup.UrlDedup, consulted by fetchers before any per-item work
+        self.dedup = dedup
+        # Optional parse_pool.ParsePool; without one, parsing runs in the fetching thread
+        self.parse_pool = parse_pool
+        # source -> conditional fetch counters since the last take_stats
+        self.stats = {}
+        # source -> [(url, score)] engagement readings, collected by ingestion with take_scores
+        self.scores = {}
+        self._sessions = {}
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pool = None
+
+    def _host_state(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return session, self._host_limits[host]
+
+    def get(self, url, **kwargs):
+        # Blocks while the host already has `per_host` requests in flight
+        session, limit = self._host_state(url)
+        kwargs.setdefault("timeout", self.timeout)
+        with limit, metrics.span("network"):
+            return session.get(url, **kwargs)
+
+    def get_conditional(self, url, **kwargs):
+        """GET ``url`` with the stored ETag/Last-Modified validators.
+
+        Returns ``None`` when the server answers 304 Not Modified, so the
+        caller can skip parsing and database work entirely.
+        """
+        with self._lock:
+            cached = self.validators.get(url)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.get(url, headers=headers, **kwargs)
+        stats = self._source_stats()
+
+        if response.status_code == 304 and cached:
+            with self._lock:
+                stats["not_modified"] += 1
+                stats["skipped_parses"] += 1
+                stats["bytes_saved"] += cached.get("content_length") or 0
+            metrics.inc("newshub_fetch_not_modified_total")
+            metrics.inc("newshub_fetch_skipped_parses_total")
+            metrics.inc("newshub_fetch_bytes_saved_total", cached.get("content_length") or 0)
+            return None
+
+        response.raise_for_status()
+        # Streamed bodies are left unread for the caller, so trust Content-Length
+        if kwargs.get("stream"):
+            length = int(response.headers.get("Content-Length") or 0)
+        else:
+            length = len(response.content)
+        metrics.inc("newshub_fetch_bytes_total", length)
+        source = getattr(self._local, "source", None) or "default"
+        with self._lock:
+            stats["bytes_downloaded"] += length
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                # Until the body is parsed and stored, a 304 against these would lose it
+                self.pending_validators.setdefault(source, {})[url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "content_length": length
+                }
+        return response
+
+    def parse(self, fn, *args):
+        """Run ``fn(*args)`` (a Source parse function) in the parse pool if there is one."""
+        with metrics.span("parse"):
+            if self.parse_pool is None:
+                records = fn(*args)
+            else:
+                records = self.parse_pool.parse(fn, *args)
+        metrics.inc("newshub_items_seen_total", len(records))
+        return records
+
+    def is_seen(self, url):
+        if self.dedup is None or url not in self.dedup:
+            return False
+        stats = self._source_stats()
+        with self._lock:
+            stats["duplicates_skipped"] += 1
+        metrics.inc("newshub_fetch_duplicates_skipped_total")
+        return True
+
+    def observe_scores(self, readings):
+        """Report ``(url, score)`` for every item a fetch saw, including ones already stored."""
+        source = getattr(self._local, "source", None) or "default"
+        with self._lock:
+            self.scores.setdefault(source, []).extend(readings)
+
+    def take_scores(self, source):
+        with self._lock:
+            return self.scores.pop(source, [])
+
+    def keep_validators(self, source):
+        """Adopt ``source``'s pending validators, once its records are in the database."""
+        with self._lock:
+            for url, validators in self.pending_validators.pop(source, {}).items():
+                self.validators[url] = dict(validators, dirty=True)
+
+    def drop_validators(self, source):
+        # The fetch or its ingestion failed: the next one must download the pages again
+        with self._lock:
+            self.pending_validators.pop(source, None)
+
+    def take_stats(self):
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def _source_stats(self):
+        source = getattr(self._local, "source", None) or "default"
+        with self._lock:
+            if source not in self.stats:
+                self.stats[source] = {
+                    "not_modified": 0, "skipped_parses": 0, "bytes_saved": 0,
+                    "bytes_downloaded": 0, "duplicates_skipped": 0
+                }
+            return self.stats[source]
+
+    def run(self, jobs, max_pending=None):
+        """Run ``(name, fn)`` jobs concurrently, yielding ``(name, result)`` as each finishes.
+
+        ``fn`` receives the engine and should return a list of records. A job
+        that raises yields an empty list so one failing source never stalls
+        the rest of the cycle. At most ``max_pending`` jobs (default twice the
+        worker count) are started ahead of the consumer, so finished results
+        never pile up faster than the caller writes them.
+        """
+        jobs = iter(jobs)
+        max_pending = max_pending or self.max_workers * 2
+        futures = {}
+
+        def refill():
+            for name, fn in jobs:
+                futures[self.submit(name, fn)] = name
+                if len(futures) >= max_pending:
+                    return
+
+        refill()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error fetching {name}: {e}")
+                    result = []
+                yield name, result
+            refill()
+
+    def submit(self, name, fn):
+        """Start one ``(name, fn)`` job on the shared worker pool and return its Future.
+
+        Unlike ``run`` the job's exception is left on the Future, so callers
+        such as the scheduler can tell a failed fetch from an empty one.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._pool.submit(self._run_job, name, fn)
+
+    def _run_job(self, name, fn):
+        # Lets get_conditional and metrics attribute their counters to the running source
+        self._local.source = name
+        start = time.perf_counter()
+        try:
+            with metrics.source_context(name):
+                records = fn(self)
+        except Exception as e:
+            self.drop_validators(name)
+            metrics.inc("newshub_fetch_errors_total", source=name)
+            metrics.log_event("fetch_failed", logging.WARNING, source=name,
+                              seconds=round(time.perf_counter() - start, 3), error=str(e))
+            raise
+        finally:
+            self._local.source = None
+        metrics.log_event("fetch_finished", source=name, seconds=round(time.perf_counter() - start, 3),
+                          records=len(records))
+        return records
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._host_limits.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Validator cache, persisted in the http_validators table next to articles
+def load_validators(cursor):
+    cursor.execute("SELECT url, etag, last_modified, content_length FROM http_validators")
+    return {
+        row[0]: {"etag": row[1], "last_modified": row[2], "content_length": row[3]}
+        for row in cursor.fetchall()
+    }
+
+
+def save_validators(conn, cursor, validators):
+    changed = [
+        (url, v.get("etag"), v.get("last_modified"), v.get("content_length"))
+        for url, v in validators.items() if v.pop("dirty", False)
+    ]
+    cursor.executemany(
+        "INSERT OR REPLACE INTO http_validators (url, etag, last_modified, content_length, updated_date) "
+        "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        changed
+    )
+    conn.commit()
+    return len(changed)
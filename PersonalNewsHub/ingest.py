@@ -0,0 +1,103 @@
+from dedup import clean_url
+
+
+# Signal readers (response cache, exports) that the article data changed
+def bump_data_version(cursor):
+    cursor.execute("UPDATE app_state SET value = value + 1 WHERE key = 'data_version'")
+
+
+# Highest article id ready to show, polled by the web app's live updates (see live_updates.py).
+# Set once new articles are clustered, so open dashboards can tell copies of a story apart
+def set_high_water(cursor, article_id):
+    cursor.execute("INSERT OR REPLACE INTO app_state (key, value) VALUES ('article_high_water', ?)", (article_id,))
+
+
+# Names of article ``a``'s tags, comma separated, for any query over ``articles a``
+TAGS_SQL = '''(SELECT GROUP_CONCAT(g.name, ',') FROM article_tags t JOIN tags g ON g.id = t.tag_id
+ WHERE t.article_id = a.id)'''
+
+
+def get_data_version(conn):
+    row = conn.execute("SELECT value FROM app_state WHERE key = 'data_version'").fetchone()
+    return row[0] if row else 0
+
+
+# Ids of the given tag names in the tags dictionary, adding any that are new
+def tag_ids(cursor, names):
+    names = list(names)
+    cursor.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(name,) for name in names])
+    ids = {}
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        cursor.execute(f"SELECT name, id FROM tags WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+        ids.update(cursor.fetchall())
+    return ids
+
+
+def ingest_articles(conn, records):
+    """Insert a batch of normalized article records and their tags in one transaction.
+
+    Each record is a dict with ``title``, ``url`` and ``source`` plus optional
+    ``published_date``, ``summary``, ``category``, ``tags`` and a
+    ``(namespace, id)`` ``external_id``. Records are deduplicated by URL in
+    memory (after tracking parameters are stripped) and written with
+    ``executemany``. The transaction takes the write lock before it reads the
+    max id, and ids are AUTOINCREMENT, so every row above that id is one of
+    this batch's, which resolves the inserted ids in one range scan. Any
+    error rolls the whole batch back.
+
+    Returns the list of records that were actually inserted, each with its
+    new ``id`` set.
+    """
+    unique = {}
+    for record in records:
+        record["url"] = clean_url(record["url"])
+        unique.setdefault(record["url"], record)
+    if not unique:
+        return []
+
+    cursor = conn.cursor()
+    try:
+        # Another process (backfill-arxiv, archive) could otherwise commit rows
+        # between reading the max id and inserting
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM articles")
+        last_id = cursor.fetchone()[0]
+
+        cursor.executemany(
+            "INSERT OR IGNORE INTO articles (title, url, source, published_date, summary, category) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r["title"], r["url"], r["source"], r.get("published_date"), r.get("summary"), r.get("category"))
+                for r in unique.values()
+            ]
+        )
+
+        cursor.execute("SELECT id, url FROM articles WHERE id > ?", (last_id,))
+        new_records = []
+        tag_rows = []
+        for article_id, url in cursor.fetchall():
+            record = unique[url]
+            record["id"] = article_id
+            new_records.append(record)
+            for tag in set(record.get("tags") or ()):
+                tag_rows.append((article_id, tag))
+
+        ids = tag_ids(cursor, {tag for _, tag in tag_rows})
+        cursor.executemany(
+            "INSERT OR IGNORE INTO article_tags (article_id, tag_id) VALUES (?, ?)",
+            [(article_id, ids[tag]) for article_id, tag in tag_rows]
+        )
+        # Remember source-native ids of everything fetched, new or duplicate
+        cursor.executemany(
+            "INSERT OR IGNORE INTO known_items (namespace, item_id) VALUES (?, ?)",
+            [r["external_id"] for r in records if r.get("external_id")]
+        )
+        if new_records:
+            bump_data_version(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return new_records
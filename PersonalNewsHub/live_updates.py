@@ -0,0 +1,265 @@
+"""Pushes newly ingested articles to open dashboards (Server-Sent Events).
+
+Once a batch is stored and clustered, the fetcher records its highest
+article id in app_state ("article_high_water", see ingest.set_high_water).
+One ArticleBroadcaster per web process polls that key, a single
+primary-key read, and only when it changes runs one query for the articles
+between its own mark and the key, so no article is sent before its
+cluster_id is set. Each batch is then filtered in Python
+for every subscribed dashboard (age, category, source, tag, story
+collapsing through the earliest copy that passes the rest),
+plus one full-text query per distinct search. A thousand open dashboards
+cost the same database work per ingestion as one.
+
+A page embeds the highest article id it was rendered from and subscribes
+with it, so it is sent exactly the articles above that. The last RECENT
+articles are kept in memory, so a reconnecting client (EventSource resends
+the last event id) gets what it missed without a query. A client further
+behind, or one too slow to drain its queue, is told to reload.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import database
+import metrics
+from ingest import TAGS_SQL
+
+POLL_INTERVAL = 0.5
+RECENT = 1000
+# Most articles read per query; a bigger ingestion is sent in several batches
+BATCH = 500
+# Undelivered messages a subscriber may have before it is dropped
+QUEUE_SIZE = 100
+
+NEW_ARTICLES_SQL = f'''
+SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, a.added_date, a.cluster_id,
+       {TAGS_SQL} as tags
+FROM articles a
+WHERE a.id > ? AND a.id <= ?
+ORDER BY a.id
+LIMIT ?
+'''
+
+# Older articles of a story, which a collapsed dashboard may already show in its place
+EARLIER_COPIES_SQL = f'''
+SELECT a.id, a.category, a.source, a.added_date, a.cluster_id, {TAGS_SQL} as tags
+FROM articles a
+WHERE a.cluster_id = ? AND a.id < ?
+'''
+
+
+def article_dict(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "url": row["url"],
+        "source": row["source"],
+        "published_date": row["published_date"],
+        "added_date": row["added_date"],
+        "summary": row["summary"],
+        "category": row["category"],
+        "cluster_id": row["cluster_id"],
+        "tags": row["tags"].split(',') if row["tags"] else [],
+    }
+
+
+class Subscription:
+    """One dashboard's filters and its queue of ("articles", mark, [article]) / ("reset",) messages.
+
+    ``filters`` has ``days`` (or None), ``category`` and ``source`` ('all'
+    for any), ``tag`` (a name or None), ``match`` (an FTS5 query or None)
+    and ``collapse_stories``.
+    """
+
+    def __init__(self, filters, since):
+        self.filters = filters
+        self.since = since
+        self.messages = queue.Queue(QUEUE_SIZE)
+
+    def passes(self, article, search_hits):
+        """Whether the page's filters admit ``article``, as build_article_query would."""
+        filters = self.filters
+        if filters["days"] is not None:
+            # DATE('now', '-N days') is a UTC date
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=filters["days"])).strftime("%Y-%m-%d")
+            if article["added_date"] < cutoff:
+                return False
+        if filters["category"] != 'all' and article["category"] != filters["category"]:
+            return False
+        if filters["source"] != 'all' and article["source"] != filters["source"]:
+            return False
+        if filters["tag"] is not None and filters["tag"] not in article["tags"]:
+            return False
+        if filters["match"] is not None and article["id"] not in search_hits[filters["match"]]:
+            return False
+        return True
+
+    def matches(self, article, search_hits, copies):
+        if article["id"] <= self.since:
+            return False  # Already on the page
+        if not self.passes(article, search_hits):
+            return False
+        # A later copy of a story the page shows through an earlier one that passes its filters
+        if self.filters["collapse_stories"] and article["cluster_id"] is not None:
+            return not any(copy["id"] < article["id"] and self.passes(copy, search_hits)
+                           for copy in copies.get(article["cluster_id"], ()))
+        return True
+
+    def send(self, message):
+        try:
+            self.messages.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        return self.messages.get(timeout=timeout)
+
+
+class ArticleBroadcaster:
+    """Fans each ingestion's new articles out to every Subscription.
+
+    The polling thread starts with the first subscriber and idles, without
+    touching the database, while there are none.
+    """
+
+    def __init__(self, path=None, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._signal = None
+        self._mark = 0
+        self._recent = deque()
+        self._floor = 0  # _recent holds every article with an id above this
+
+    def _connect(self):
+        self._conn = database.connect_reader(self.path)
+        self._conn.row_factory = sqlite3.Row
+        self._signal = self._read_signal()
+        # Start with the newest RECENT signalled articles in memory, for clients that rendered their page a moment ago
+        self._floor = self._mark = self._conn.execute(
+            "SELECT IFNULL(MIN(id) - 1, 0) FROM (SELECT id FROM articles WHERE id <= ? ORDER BY id DESC LIMIT ?)",
+            (self._signal, RECENT)
+        ).fetchone()[0]
+        while self._fetch_new():
+            pass
+
+    def _read_signal(self):
+        row = self._conn.execute("SELECT value FROM app_state WHERE key = 'article_high_water'").fetchone()
+        return row[0] if row else 0
+
+    def _fetch_new(self):
+        # Rows above the signal may be committed but not yet clustered
+        rows = self._conn.execute(NEW_ARTICLES_SQL, (self._mark, self._signal, BATCH))
+        articles = [article_dict(row) for row in rows]
+        if articles:
+            self._recent.extend(articles)
+            while len(self._recent) > RECENT:
+                self._floor = self._recent.popleft()["id"]
+            self._mark = articles[-1]["id"]
+        return articles
+
+    def _earlier_copies(self, articles):
+        # cluster id -> the story's articles older than the newest of this batch that joined it
+        newest = {}
+        for article in articles:
+            if article["cluster_id"] not in (None, article["id"]):
+                newest[article["cluster_id"]] = article["id"]
+        copies = {}
+        for cluster_id, article_id in newest.items():
+            copies[cluster_id] = [
+                {"id": row["id"], "category": row["category"], "source": row["source"],
+                 "added_date": row["added_date"], "tags": row["tags"].split(',') if row["tags"] else []}
+                for row in self._conn.execute(EARLIER_COPIES_SQL, (cluster_id, article_id))
+            ]
+        return copies
+
+    def _search_hits(self, subscribers, low, high, older_ids):
+        hits = {}
+        older_ids = list(older_ids)
+        for match in {subscription.filters["match"] for subscription in subscribers} - {None}:
+            hits[match] = {row[0] for row in self._conn.execute(
+                "SELECT rowid FROM articles_fts WHERE articles_fts MATCH ? AND rowid > ? AND rowid <= ?",
+                (match, low, high)
+            )}
+            if older_ids:
+                hits[match].update(row[0] for row in self._conn.execute(
+                    f"SELECT rowid FROM articles_fts WHERE articles_fts MATCH ? "
+                    f"AND rowid IN ({','.join('?' * len(older_ids))})",
+                    [match] + older_ids
+                ))
+        return hits
+
+    def _deliver(self, subscribers, articles, low):
+        copies = self._earlier_copies(articles)
+        older_ids = {copy["id"] for story in copies.values() for copy in story if copy["id"] <= low}
+        search_hits = self._search_hits(subscribers, low, self._mark, older_ids)
+        for subscription in subscribers:
+            matching = [article for article in articles if subscription.matches(article, search_hits, copies)]
+            if not subscription.send(("articles", self._mark, matching)):
+                self._drop(subscription)
+
+    def _drop(self, subscription):
+        self._subscribers.discard(subscription)
+        # Make room for the reset so the client hears about it
+        try:
+            subscription.messages.get_nowait()
+        except queue.Empty:
+            pass
+        subscription.send(("reset",))
+
+    def subscribe(self, filters, since=None):
+        """Register a dashboard; ``since`` is the last article id it has (default: now)."""
+        with self._lock:
+            if self._conn is None:
+                self._connect()
+            subscription = Subscription(filters, self._mark if since is None else since)
+            if since is not None and since < self._mark:
+                if since < self._floor:
+                    subscription.send(("reset",))
+                    return subscription
+                missed = [article for article in self._recent if article["id"] > since]
+                self._deliver([subscription], missed, since)
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="article-broadcaster", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def poll(self):
+        """Check the ingestion signal once and push any new articles; returns how many were read."""
+        with self._lock:
+            if not self._subscribers:
+                return 0
+            signal = self._read_signal()
+            if signal == self._signal:
+                return 0
+            self._signal = signal
+            total = 0
+            while True:
+                low = self._mark
+                articles = self._fetch_new()
+                if not articles:
+                    return total
+                metrics.REGISTRY.inc("newshub_live_batches_total")
+                total += len(articles)
+                self._deliver(list(self._subscribers), articles, low)
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Live update poll failed: {e}")
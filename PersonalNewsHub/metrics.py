@@ -0,0 +1,220 @@
+"""Counters, timing histograms and JSON logs for the fetcher and the web app.
+
+Metrics live in an in-process Registry and are rendered in the Prometheus
+text format by ``/metrics`` in webinterface.py. The fetcher runs as a
+separate process, so it stores its registry in the metrics_snapshots
+table after every cycle and the web app merges that in. Samples are
+labelled with the source being fetched; FetchEngine sets it per job and
+ParsePool carries it into worker processes.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+# name -> (type, help)
+METRICS = {
+    "newshub_phase_seconds": ("histogram", "Time per fetch phase (network, parse, tag, db) and source"),
+    "newshub_fetch_bytes_total": ("counter", "Response bytes downloaded per source"),
+    "newshub_fetch_not_modified_total": ("counter", "Conditional requests answered 304 Not Modified"),
+    "newshub_fetch_bytes_saved_total": ("counter", "Response bytes not downloaded thanks to a 304, per source"),
+    "newshub_fetch_skipped_parses_total": ("counter", "Responses not parsed because they were unchanged, per source"),
+    "newshub_fetch_duplicates_skipped_total": ("counter", "Fetched items dropped by the URL dedup filter, per source"),
+    "newshub_fetch_errors_total": ("counter", "Fetch jobs that raised, per source"),
+    "newshub_items_seen_total": ("counter", "Items parsed from a source, before any duplicate filtering"),
+    "newshub_items_inserted_total": ("counter", "Items that were new and written to the database"),
+    "newshub_articles_archived_total": ("counter", "Articles moved to the archive database by retention"),
+    "newshub_pages_vacuumed_total": ("counter", "Free database pages returned to the filesystem"),
+    "newshub_http_request_seconds": ("histogram", "Flask request handling time per route"),
+    "newshub_db_seconds": ("histogram", "SQLite time spent per web request, per route"),
+    "newshub_db_queries_total": ("counter", "SQLite statements executed by web requests, per route"),
+    "newshub_db_pool_timeouts_total": ("counter", "Web requests answered 503 for want of a pooled connection"),
+    "newshub_response_cache_hits_total": ("counter", "Rendered-page cache hits"),
+    "newshub_response_cache_misses_total": ("counter", "Rendered-page cache misses"),
+    "newshub_live_batches_total": ("counter", "New-article queries run to push live dashboard updates"),
+}
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Registry:
+    """Thread-safe store of counter values and histogram buckets keyed by (name, labels)."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.counters[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def dump(self):
+        # Plain lists, so the result pickles to the parent process and serializes to JSON
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), [list(h[0]), h[1], h[2]]]
+                               for (name, labels), h in self.histograms.items()]
+            }
+
+    def merge(self, dump):
+        with self._lock:
+            for name, labels, value in dump["counters"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, (buckets, total, count) in dump["histograms"]:
+                key = (name, tuple(tuple(label) for label in labels))
+                histogram = self.histograms.setdefault(key, [[0] * len(BUCKETS), 0.0, 0])
+                histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+                histogram[1] += total
+                histogram[2] += count
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, default_type):
+            if name not in described:
+                described.add(name)
+                kind, text = METRICS.get(name, (default_type, name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            describe(name, "histogram")
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+REGISTRY = Registry()
+
+_context = threading.local()
+
+
+def current_source():
+    return getattr(_context, "source", None) or "default"
+
+
+@contextmanager
+def source_context(name):
+    # Label every sample recorded in this thread with the source being fetched
+    previous = getattr(_context, "source", None)
+    _context.source = name
+    try:
+        yield
+    finally:
+        _context.source = previous
+
+
+def inc(name, value=1, **labels):
+    labels.setdefault("source", current_source())
+    REGISTRY.inc(name, value, **labels)
+
+
+@contextmanager
+def span(phase):
+    """Time a block as one ``phase`` of the current source's fetch."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("newshub_phase_seconds", time.perf_counter() - start,
+                         phase=phase, source=current_source())
+
+
+def run_isolated(source, fn, *args):
+    """Run ``fn`` in a ParsePool worker; returns its result and the samples it recorded."""
+    REGISTRY.reset()
+    with source_context(source):
+        result = fn(*args)
+    return result, REGISTRY.dump()
+
+
+# The fetcher's registry, shared with the web app through the database
+def save_snapshot(conn, process="fetcher"):
+    conn.execute(
+        "INSERT OR REPLACE INTO metrics_snapshots (process, body, updated_date) VALUES (?, ?, CURRENT_TIMESTAMP)",
+        (process, json.dumps(REGISTRY.dump()))
+    )
+    conn.commit()
+
+
+def load_snapshots(conn):
+    registry = Registry()
+    for (body,) in conn.execute("SELECT body FROM metrics_snapshots"):
+        registry.merge(json.loads(body))
+    return registry
+
+
+# Structured logs: one JSON object per line on the "newshub" logger
+logger = logging.getLogger("newshub")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower(), "event": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=logging.INFO, stream=None):
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log_event(event, level=logging.INFO, **fields):
+    logger.log(level, event, extra={"fields": fields})
@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+
+class ParsePool:
+    """Process pool for the CPU-bound half of fetching: parsing, normalizing, tagging.
+
+    Fetch threads download raw bytes and hand them to ``parse(fn, *args)``,
+    which runs ``fn`` (a Source's module-level parse function) in a worker
+    process and returns its compact records. Threads only wait on a result
+    there, so parsing scales across cores instead of sharing one GIL. At most
+    ``max_pending`` parses are queued or running; further fetch threads
+    block until a slot frees up, which keeps downloaded-but-unparsed bytes
+    bounded.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # Workers are spawned fresh rather than forked from a process full of threads
+        self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def parse(self, fn, *args):
+        with self._slots:
+            result, samples = self._pool.submit(metrics.run_isolated, metrics.current_source(), fn, *args).result()
+        # Timings recorded inside the worker (e.g. tagging) join this process's metrics
+        metrics.REGISTRY.merge(samples)
+        return result
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
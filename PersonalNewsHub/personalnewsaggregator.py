@@ -1,18 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
-import feedparser
-import sqlite3
-import time
-import json
-import re
-from datetime import datetime, timedelta
-import os
-import schedule
-
-
-# Database setup
+import argparse
+
+import database
+from fetch_engine import FetchEngine, load_validators, save_validators
+from clustering import (SIGNATURE_VERSION, cluster_articles, cluster_backfill, prune_signatures, recluster_window,
+                        signature_version)
+from dedup import UrlDedup
+from export import export_recent_news, iter_recent_news
+from ingest import ingest_articles, set_high_water
+import metrics
+from ranking import rebuild_rankings, update_rankings
+from retention import retention_policy, run_retention
+from scheduler import SourceScheduler
+from parse_pool import ParsePool
+from sources import SOURCES_CONFIG_PATH, load_retention, load_sources
+
+
+# Database setup, on the writer connection (WAL mode, see database.py)
 def setup_database():
-    conn = sqlite3.connect('news_aggregator.db')
+    conn = database.connect_writer()
     cursor = conn.cursor()
 
     # Create tables if they don't exist
@@ -25,365 +30,446 @@ def setup_database():
         published_date TEXT,
         summary TEXT,
         category TEXT,
-        added_date TEXT DEFAULT CURRENT_TIMESTAMP
+        added_date TEXT DEFAULT CURRENT_TIMESTAMP,
+        cluster_id INTEGER
     )
     ''')
 
-    # Create table for keywords/tags
+    # Databases created before story clustering lack the cluster_id column
+    cursor.execute("PRAGMA table_info(articles)")
+    if "cluster_id" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE articles ADD COLUMN cluster_id INTEGER")
+
+    # Tag dictionary, with the number of articles carrying each tag kept by triggers
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tags (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        article_count INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_article_count ON tags (article_count)")
+
+    # Databases from before the dictionary stored the tag text on every article_tags row
+    cursor.execute("PRAGMA table_info(article_tags)")
+    if "tag" in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE article_tags RENAME TO article_tags_legacy")
+        # The old (tag, article_id) index moves with the table and would keep its name from the new one
+        cursor.execute("DROP INDEX IF EXISTS idx_article_tags_tag")
+    # Also picks up a migration that was interrupted after the rename
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'article_tags_legacy'")
+    legacy_tags = cursor.fetchone() is not None
+
+    # Article/tag pairs as plain integers, clustered by article
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS article_tags (
-        article_id INTEGER,
-        tag TEXT,
-        PRIMARY KEY (article_id, tag),
-        FOREIGN KEY (article_id) REFERENCES articles(id)
+        article_id INTEGER NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY (article_id, tag_id)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_tags_tag ON article_tags (tag_id, article_id)")
+    if legacy_tags:
+        migrate_article_tags(conn)
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS tags_count_insert AFTER INSERT ON article_tags BEGIN
+        UPDATE tags SET article_count = article_count + 1 WHERE id = new.tag_id;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS tags_count_delete AFTER DELETE ON article_tags BEGIN
+        UPDATE tags SET article_count = article_count - 1 WHERE id = old.tag_id;
+    END
+    ''')
+
+    # Secondary indexes for the dashboard filters and tag lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_added_date ON articles (added_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_source_added ON articles (source, added_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_category_added ON articles (category, added_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles (cluster_id)")
+
+    # Full-text index over title and summary, kept in sync by triggers
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'")
+    fts_exists = cursor.fetchone() is not None
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, summary,
+        content='articles', content_rowid='id',
+        prefix='2 3'
     )
     ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, summary ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+        INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+    END
+    ''')
+    if not fts_exists:
+        # Existing database: index the articles stored before FTS was added
+        rebuild_search_index(conn)
+
+    # Rollup tables behind /stats and the dashboard filters, maintained by triggers
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'stats_daily'")
+    stats_exist = cursor.fetchone() is not None
+    cursor.execute("CREATE TABLE IF NOT EXISTS stats_daily (date TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS stats_source (source TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS stats_category (category TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS stats_article_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO stats_daily (date, count) VALUES (DATE(new.added_date), 1)
+            ON CONFLICT (date) DO UPDATE SET count = count + 1;
+        INSERT INTO stats_source (source, count) VALUES (new.source, 1)
+            ON CONFLICT (source) DO UPDATE SET count = count + 1;
+        INSERT INTO stats_category (category, count) VALUES (IFNULL(new.category, ''), 1)
+            ON CONFLICT (category) DO UPDATE SET count = count + 1;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS stats_article_delete AFTER DELETE ON articles BEGIN
+        UPDATE stats_daily SET count = count - 1 WHERE date = DATE(old.added_date);
+        UPDATE stats_source SET count = count - 1 WHERE source = old.source;
+        UPDATE stats_category SET count = count - 1 WHERE category = IFNULL(old.category, '');
+        DELETE FROM stats_daily WHERE date = DATE(old.added_date) AND count <= 0;
+        DELETE FROM stats_source WHERE source = old.source AND count <= 0;
+        DELETE FROM stats_category WHERE category = IFNULL(old.category, '') AND count <= 0;
+    END
+    ''')
+    if not stats_exist:
+        # Existing database: backfill the rollups from what is already stored
+        rebuild_stats(conn)
 
-    conn.commit()
-    return conn, cursor
+    # Source-native item ids (e.g. Reddit fullnames) already seen, for early-stop paging
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS known_items (
+        namespace TEXT NOT NULL,
+        item_id TEXT NOT NULL,
+        PRIMARY KEY (namespace, item_id)
+    )
+    ''')
 
+    # MinHash signatures and LSH band buckets of recent articles, for near-duplicate clustering
+    cursor.execute("CREATE TABLE IF NOT EXISTS article_minhash (article_id INTEGER PRIMARY KEY, signature BLOB NOT NULL)")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lsh_buckets (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        article_id INTEGER NOT NULL,
+        PRIMARY KEY (band, bucket, article_id)
+    ) WITHOUT ROWID
+    ''')
 
-# HackerNews scraper (improved version of your existing code)
-def fetch_hackernews(conn, cursor, num_posts=30):
-    print("Fetching HackerNews posts...")
-    url = "https://news.ycombinator.com/"
+    # Engagement readings (HN points, Reddit score), one row per change, and the
+    # materialized top of the hot ranking (see ranking.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS score_snapshots (
+        article_id INTEGER NOT NULL,
+        observed INTEGER NOT NULL,
+        score INTEGER NOT NULL,
+        PRIMARY KEY (article_id, observed)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'hot_articles'")
+    hot_exists = cursor.fetchone() is not None
+    cursor.execute("CREATE TABLE IF NOT EXISTS hot_articles (article_id INTEGER PRIMARY KEY, hot REAL NOT NULL, score INTEGER)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hot_articles_hot ON hot_articles (hot)")
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS rankings_article_delete AFTER DELETE ON articles BEGIN
+        DELETE FROM hot_articles WHERE article_id = old.id;
+        DELETE FROM score_snapshots WHERE article_id = old.id;
+    END
+    ''')
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    # Data version, bumped by every ingestion commit so readers can tell the data changed
+    cursor.execute("CREATE TABLE IF NOT EXISTS app_state (key TEXT PRIMARY KEY, value INTEGER)")
+    cursor.execute("INSERT OR IGNORE INTO app_state (key, value) VALUES ('data_version', 0)")
+    # Live updates' mark (see ingest.set_high_water); articles stored before it existed are clustered already
+    cursor.execute(
+        "INSERT OR IGNORE INTO app_state (key, value) SELECT 'article_high_water', IFNULL(MAX(id), 0) FROM articles"
+    )
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Get titles and links
-        items = []
-        rows = soup.select("tr.athing")
-
-        for row in rows[:num_posts]:
-            title_element = row.select_one(".titleline > a")
-            if not title_element:
-                continue
-
-            title = title_element.text.strip()
-            link = title_element.get('href', '')
-
-            # Handle relative URLs
-            if link.startswith('item?'):
-                link = f"{url}{link}"
-
-            item_id = row.get('id')
-
-            # Get points from the following row
-            subtext_row = soup.select_one(f"tr#score_{item_id}")
-            points = 0
-            if subtext_row:
-                points_element = subtext_row.select_one(".score")
-                if points_element:
-                    points_text = points_element.text.strip()
-                    points = int(re.search(r'\d+', points_text).group()) if re.search(r'\d+', points_text) else 0
-
-            # Insert into database
-            try:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO articles (title, url, source, published_date, category) VALUES (?, ?, ?, ?, ?)",
-                    (title, link, "HackerNews", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "Tech")
-                )
+    # Learned polling interval and next due time (epoch seconds) per source
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS source_schedule (
+        source TEXT PRIMARY KEY,
+        interval REAL NOT NULL,
+        next_due REAL,
+        failures INTEGER NOT NULL DEFAULT 0,
+        updated_date TEXT
+    )
+    ''')
 
-                # If insertion was successful, get the article_id and add tags
-                if cursor.rowcount > 0:
-                    article_id = cursor.lastrowid
+    # Latest metrics registry of each process (the fetcher), read by /metrics
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metrics_snapshots (
+        process TEXT PRIMARY KEY,
+        body TEXT NOT NULL,
+        updated_date TEXT
+    )
+    ''')
+
+    # HTTP validators (ETag / Last-Modified) for conditional fetching
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS http_validators (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        content_length INTEGER,
+        updated_date TEXT
+    )
+    ''')
+
+    conn.commit()
+    # Databases created before retention.py don't return freed pages (connect_writer
+    # asked for incremental auto-vacuum, which an existing file only adopts on VACUUM)
+    cursor.execute("PRAGMA auto_vacuum")
+    incremental = cursor.fetchone()[0] == 2
+    if legacy_tags or not incremental:
+        print("Compacting the database" + (" after the tag migration..." if legacy_tags else "..."))
+        conn.execute("VACUUM")
+
+    if not hot_exists:
+        # Existing database: rank the articles stored before the hot list existed
+        rebuild_rankings(conn, source_weights())
+    if signature_version(conn) != SIGNATURE_VERSION:
+        # Stored signatures came from other shingles (or none exist yet)
+        joined = recluster_window(conn)
+        if joined:
+            print(f"Re-clustered recent articles: {joined} joined an existing story")
+    return conn, cursor
 
-                    # Extract potential tags from title
-                    tags = extract_tags(title)
-                    for tag in tags:
-                        cursor.execute(
-                            "INSERT OR IGNORE INTO article_tags (article_id, tag) VALUES (?, ?)",
-                            (article_id, tag)
-                        )
-            except sqlite3.IntegrityError:
-                # URL already exists in database
-                pass
 
-            items.append({"title": title, "url": link, "points": points})
+# Repopulate the full-text index from the articles table
+def rebuild_search_index(conn):
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    conn.commit()
 
-        conn.commit()
-        print(f"Added {len(items)} HackerNews posts")
-        return items
 
-    except Exception as e:
-        print(f"Error fetching HackerNews: {e}")
-        return []
+# Recompute every stats_* rollup table from scratch
+def rebuild_stats(conn):
+    conn.executescript('''
+    BEGIN;
+    DELETE FROM stats_daily;
+    DELETE FROM stats_source;
+    DELETE FROM stats_category;
+    INSERT INTO stats_daily (date, count) SELECT DATE(added_date), COUNT(*) FROM articles GROUP BY DATE(added_date);
+    INSERT INTO stats_source (source, count) SELECT source, COUNT(*) FROM articles GROUP BY source;
+    INSERT INTO stats_category (category, count) SELECT IFNULL(category, ''), COUNT(*) FROM articles GROUP BY IFNULL(category, '');
+    UPDATE tags SET article_count = (SELECT COUNT(*) FROM article_tags t WHERE t.tag_id = tags.id);
+    COMMIT;
+    ''')
 
 
-# Reddit scraper (improved version of your existing code)
-def fetch_reddit(conn, cursor, subreddit="ArtificialInteligence", num_posts=30):
-    print(f"Fetching Reddit r/{subreddit} posts...")
+# Move the renamed pre-dictionary article_tags rows (article_id, tag text) into
+# the tags dictionary and the integer article_tags table, then drop the old
+# table and the stats_tag rollup the dictionary's counts replace
+def migrate_article_tags(conn):
+    print("Migrating article_tags to the tags dictionary...")
+    conn.executescript('''
+    BEGIN;
+    INSERT OR IGNORE INTO tags (name) SELECT DISTINCT tag FROM article_tags_legacy WHERE tag IS NOT NULL;
+    INSERT OR IGNORE INTO article_tags (article_id, tag_id)
+        SELECT l.article_id, g.id FROM article_tags_legacy l JOIN tags g ON g.name = l.tag
+        ORDER BY l.article_id, g.id;
+    UPDATE tags SET article_count = (SELECT COUNT(*) FROM article_tags t WHERE t.tag_id = tags.id);
+    DROP TABLE article_tags_legacy;
+    DROP TABLE IF EXISTS stats_tag;
+    COMMIT;
+    ''')
 
-    # Use Reddit's JSON API instead of scraping HTML
-    url = f"https://www.reddit.com/r/{subreddit}/.json?limit={num_posts}"
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+# Sources declared in sources.toml (or use_sources_config's file), loaded on first use
+_sources_path = SOURCES_CONFIG_PATH
+_sources = None
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        posts = []
-        for post in data['data']['children']:
-            post_data = post['data']
-            title = post_data['title']
-            url = post_data['url']
-            created = datetime.fromtimestamp(post_data['created_utc']).strftime("%Y-%m-%d %H:%M:%S")
-            score = post_data['score']
-            selftext = post_data.get('selftext', '')[:500]  # Limit summary length
-
-            # Insert into database
-            try:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO articles (title, url, source, published_date, summary, category) VALUES (?, ?, ?, ?, ?, ?)",
-                    (title, url, f"Reddit/r/{subreddit}", created, selftext, "AI")
-                )
-
-                # If insertion was successful, get the article_id and add tags
-                if cursor.rowcount > 0:
-                    article_id = cursor.lastrowid
-
-                    # Extract potential tags from title
-                    tags = extract_tags(title)
-                    for tag in tags:
-                        cursor.execute(
-                            "INSERT OR IGNORE INTO article_tags (article_id, tag) VALUES (?, ?)",
-                            (article_id, tag)
-                        )
-            except sqlite3.IntegrityError:
-                # URL already exists in database
-                pass
-
-            posts.append({"title": title, "url": url, "score": score, "created": created})
-
-        conn.commit()
-        print(f"Added {len(posts)} Reddit posts from r/{subreddit}")
-        return posts
-
-    except Exception as e:
-        print(f"Error fetching Reddit: {e}")
-        return []
-
-
-# ArXiv API for AI/ML papers
-def fetch_arxiv(conn, cursor, num_papers=20):
-    print("Fetching ArXiv papers...")
-    categories = ["cs.AI", "cs.LG", "cs.CL"]  # AI, Machine Learning, Computational Linguistics
-
-    base_url = "http://export.arxiv.org/api/query?"
-    query_params = {
-        "search_query": f"cat:{' OR cat:'.join(categories)}",
-        "start": 0,
-        "max_results": num_papers,
-        "sortBy": "submittedDate",
-        "sortOrder": "descending"
-    }
-
-    query_string = "&".join([f"{k}={v}" for k, v in query_params.items()])
-    url = base_url + query_string
 
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
+def get_sources():
+    global _sources
+    if _sources is None:
+        _sources = {source.name: source for source in load_sources(_sources_path)}
+    return _sources
 
-        # Parse the XML response
-        soup = BeautifulSoup(response.content, "xml")
-        entries = soup.find_all("entry")
 
-        papers = []
-        for entry in entries:
-            title = entry.title.text.strip().replace("\n", " ")
-            url = entry.id.text.strip()
-            published = entry.published.text.strip()
-            summary = entry.summary.text.strip().replace("\n", " ")[:500]  # Limit summary length
+# Hot ranking weight of each configured source
+def source_weights():
+    return {name: source.weight() for name, source in get_sources().items()}
 
-            # Get categories/tags
-            categories = [category.get("term") for category in entry.find_all("category")]
 
-            # Insert into database
-            try:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO articles (title, url, source, published_date, summary, category) VALUES (?, ?, ?, ?, ?, ?)",
-                    (title, url, "ArXiv", published, summary, "Research")
-                )
-
-                # If insertion was successful, get the article_id and add tags
-                if cursor.rowcount > 0:
-                    article_id = cursor.lastrowid
-
-                    # Add ArXiv categories as tags
-                    for category in categories:
-                        cursor.execute(
-                            "INSERT OR IGNORE INTO article_tags (article_id, tag) VALUES (?, ?)",
-                            (article_id, category)
-                        )
-
-                    # Extract additional tags from title
-                    title_tags = extract_tags(title)
-                    for tag in title_tags:
-                        cursor.execute(
-                            "INSERT OR IGNORE INTO article_tags (article_id, tag) VALUES (?, ?)",
-                            (article_id, tag)
-                        )
-            except sqlite3.IntegrityError:
-                # URL already exists in database
-                pass
-
-            papers.append({"title": title, "url": url, "published": published})
-
-        conn.commit()
-        print(f"Added {len(papers)} ArXiv papers")
-        return papers
-
-    except Exception as e:
-        print(f"Error fetching ArXiv: {e}")
-        return []
-
-
-# RSS Feed parser for tech news sites
-def fetch_rss_feeds(conn, cursor):
-    print("Fetching RSS feeds...")
-    feeds = [
-        {"url": "https://techcrunch.com/feed/", "name": "TechCrunch", "category": "Tech News"},
-        {"url": "https://www.wired.com/feed/rss", "name": "Wired", "category": "Tech News"},
-        {"url": "https://www.technologyreview.com/feed/", "name": "MIT Technology Review", "category": "Tech News"},
-        {"url": "https://dev.to/feed/", "name": "Dev.to", "category": "Programming"}
-    ]
-
-    all_entries = []
-
-    for feed in feeds:
-        try:
-            news_feed = feedparser.parse(feed["url"])
-
-            for entry in news_feed.entries[:15]:  # Limit to 15 most recent entries per feed
-                title = entry.title
-                link = entry.link
-                published = entry.get("published", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                summary = entry.get("summary", "")[:500]  # Limit summary length
-
-                # Insert into database
-                try:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO articles (title, url, source, published_date, summary, category) VALUES (?, ?, ?, ?, ?, ?)",
-                        (title, link, feed["name"], published, summary, feed["category"])
-                    )
-
-                    # If insertion was successful, get the article_id and add tags
-                    if cursor.rowcount > 0:
-                        article_id = cursor.lastrowid
-
-                        # Extract tags from title
-                        tags = extract_tags(title)
-                        for tag in tags:
-                            cursor.execute(
-                                "INSERT OR IGNORE INTO article_tags (article_id, tag) VALUES (?, ?)",
-                                (article_id, tag)
-                            )
-                except sqlite3.IntegrityError:
-                    # URL already exists in database
-                    pass
-
-                all_entries.append({"title": title, "url": link, "source": feed["name"]})
-
-            print(f"Added entries from {feed['name']}")
-        except Exception as e:
-            print(f"Error fetching {feed['name']} RSS: {e}")
+# Retention policy from the [retention] table and each source's retain_days, loaded on first use
+_retention = None
 
-    conn.commit()
-    print(f"Added {len(all_entries)} RSS feed entries")
-    return all_entries
+
+def get_retention_policy():
+    global _retention
+    if _retention is None:
+        days = {name: source.retain_days() for name, source in get_sources().items()}
+        _retention = retention_policy(load_retention(_sources_path), days)
+    return _retention
 
 
-# Helper: Extract potential tags from text
-def extract_tags(text):
-    # List of common tech/programming/AI terms to look for
-    tech_terms = ["AI", "ML", "Python", "JavaScript", "React", "Angular", "Vue", "Node.js",
-                  "Data Science", "Deep Learning", "Neural Network", "NLP", "Computer Vision",
-                  "Cloud", "AWS", "Azure", "GCP", "DevOps", "Docker", "Kubernetes",
-                  "Blockchain", "Crypto", "API", "Microservices", "SQL", "NoSQL", "Database"]
+# Read sources from another config file instead of sources.toml
+def use_sources_config(path):
+    global _sources_path, _sources, _retention
+    _sources_path, _sources, _retention = path, None, None
+    get_retention_policy()  # Load and check the new file now rather than mid-fetch
 
-    tags = []
-    text_lower = text.lower()
 
-    for term in tech_terms:
-        if term.lower() in text_lower:
-            tags.append(term)
+# Walk deeper into ArXiv history, resuming from the offset the last backfill reached.
+# Each page is written as it arrives, so memory stays bounded.
+def backfill_arxiv(conn, cursor, max_papers=10000, name="ArXiv"):
+    from sources import arxiv
 
-    # Add any hashtags found in the text
-    hashtags = re.findall(r'#(\w+)', text)
-    tags.extend(hashtags)
+    source = get_sources()[name]
+    cursor.execute("SELECT value FROM app_state WHERE key = 'arxiv_backfill_offset'")
+    row = cursor.fetchone()
+    offset = row[0] if row else 0
 
-    return list(set(tags))  # Remove duplicates
+    added = 0
+    with FetchEngine() as engine:
+        pages = arxiv.iter_pages(
+            engine, source.settings.get("categories", arxiv.CATEGORIES),
+            max_results=max_papers, start=offset,
+            parse_page=lambda body: arxiv.parse_records(body, source.settings),
+            api=source.settings.get("url", arxiv.ARXIV_API)
+        )
+        for records in pages:
+            if records is None:
+                break
+            # Deduped, clustered, ranked and signalled to dashboards like any other fetch
+            added += len(ingest_fetched(conn, cursor, name, records))
+            offset += len(records)
+            cursor.execute("INSERT OR REPLACE INTO app_state (key, value) VALUES ('arxiv_backfill_offset', ?)", (offset,))
+            conn.commit()
+            print(f"Backfilled {added} new ArXiv papers (offset {offset})")
+    return added
 
 
 # Get recent news
 def get_recent_news(conn, cursor, days=7, limit=50):
-    cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    return list(iter_recent_news(cursor, days, limit))
+
+
+# URL dedup filter, warmed from the database once and kept across cycles
+_url_dedup = None
 
-    cursor.execute('''
-    SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, GROUP_CONCAT(t.tag, ',') as tags
-    FROM articles a
-    LEFT JOIN article_tags t ON a.id = t.article_id
-    WHERE DATE(a.added_date) >= ?
-    GROUP BY a.id
-    ORDER BY a.added_date DESC
-    LIMIT ?
-    ''', (cutoff_date, limit))
-
-    results = cursor.fetchall()
-
-    news_items = []
-    for row in results:
-        tags = row[7].split(',') if row[7] else []
-        news_items.append({
-            "id": row[0],
-            "title": row[1],
-            "url": row[2],
-            "source": row[3],
-            "published_date": row[4],
-            "summary": row[5],
-            "category": row[6],
-            "tags": tags
-        })
-
-    return news_items
-
-
-# Run all fetchers
-def fetch_all_sources():
-    conn, cursor = setup_database()
 
-    # Run all fetchers
-    fetch_hackernews(conn, cursor)
-    fetch_reddit(conn, cursor, "ArtificialInteligence")
-    fetch_reddit(conn, cursor, "programming")
-    fetch_reddit(conn, cursor, "MachineLearning")
-    fetch_arxiv(conn, cursor)
-    fetch_rss_feeds(conn, cursor)
+def get_url_dedup(cursor):
+    global _url_dedup
+    if _url_dedup is None or _url_dedup.full:
+        _url_dedup = UrlDedup.from_db(cursor)
+        report = _url_dedup.report()
+        print(f"URL dedup warmed with {report['urls']} URLs "
+              f"({report['memory_bytes'] / 1024 / 1024:.1f} MiB, "
+              f"false positive rate {report['false_positive_rate']:.2e})")
+    return _url_dedup
 
-    # Get recent news for display
-    recent_news = get_recent_news(conn, cursor)
 
-    # Save to JSON file for simple frontend access
-    with open('recent_news.json', 'w') as f:
-        json.dump(recent_news, f, indent=2)
+def reset_url_dedup():
+    global _url_dedup
+    _url_dedup = None
+
+
+# Fetch job for one source, built right before it runs so the early-stop
+# state (known Reddit and ArXiv ids) is current
+def make_job(name, cursor):
+    source = get_sources()[name]
+    state = source.prepare(cursor)
+
+    def job(engine):
+        print(f"Fetching {name}...")
+        return source.fetch(engine, state)
+    return job
+
+
+# Dedup, store and cluster one source's records and update the hot ranking with
+# its (url, score) readings; returns the inserted records
+def ingest_fetched(conn, cursor, name, records, scores=()):
+    fetched = len(records)
+    # Collapses the same story arriving from several sources
+    records = get_url_dedup(cursor).filter_new(records)
+    added, joined = [], 0
+    if records:
+        with metrics.source_context(name), metrics.span("db"):
+            try:
+                added = ingest_articles(conn, records)
+            except Exception:
+                reset_url_dedup()  # The filter already marked these URLs as seen
+                raise
+            # Group the same story reported with different URLs by different sources
+            joined = cluster_articles(conn, added)
+            if added:
+                # Only now, with cluster_id set, are the new rows pushed to open dashboards
+                set_high_water(cursor, max(record["id"] for record in added))
+                conn.commit()
+    if added or scores:
+        with metrics.source_context(name), metrics.span("db"):
+            update_rankings(conn, added, scores, source_weights())
+
+    metrics.inc("newshub_items_inserted_total", len(added), source=name)
+    metrics.log_event("source_ingested", source=name, fetched=fetched, unseen=len(records),
+                      inserted=len(added), joined_story=joined)
+    if added:
+        print(f"Added {len(added)} new articles from {name}")
+    if joined:
+        print(f"{joined} articles from {name} joined an existing story")
+    return added
+
+
+# Ingest one finished fetch; its HTTP validators are only kept once its records are stored
+def ingest_result(conn, cursor, engine, name, records):
+    try:
+        added = ingest_fetched(conn, cursor, name, records, engine.take_scores(name))
+    except Exception:
+        engine.drop_validators(name)
+        raise
+    engine.keep_validators(name)
+    return added
+
+
+# Housekeeping after new data: report and persist validators, prune old signatures,
+# archive old articles when retention is due, refresh the export
+def after_fetch(conn, cursor, engine):
+    print_fetch_stats(engine.take_stats())
+    save_validators(conn, cursor, engine.validators)
+    prune_signatures(conn)
+    archived = run_retention(conn, get_retention_policy())
+    if archived:
+        print(f"Archived {sum(archived.values())} old articles")
+    # Timings and counters for /metrics on the web app
+    metrics.save_snapshot(conn)
+
+    # Save recent news to JSON for simple frontend access (skipped when nothing new arrived)
+    if export_recent_news(conn):
+        print("Exported recent_news.json")
+
+
+# Run all fetchers once
+def fetch_all_sources():
+    conn, cursor = setup_database()
+
+    # Every source is fetched concurrently: threads download, worker processes
+    # parse, and this thread is the only DB writer
+    jobs = [(name, make_job(name, cursor)) for name in get_sources()]
+    with ParsePool() as parse_pool, \
+            FetchEngine(validators=load_validators(cursor), dedup=get_url_dedup(cursor), parse_pool=parse_pool) as engine:
+        for name, records in engine.run(jobs):
+            ingest_result(conn, cursor, engine, name, records)
+        after_fetch(conn, cursor, engine)
 
     # Print stats
-    cursor.execute("SELECT COUNT(*) FROM articles")
+    cursor.execute("SELECT IFNULL(SUM(count), 0) FROM stats_source")
     total_articles = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM articles WHERE DATE(added_date) = DATE('now')")
+    cursor.execute("SELECT IFNULL(MAX(count), 0) FROM stats_daily WHERE date = DATE('now')")
     new_today = cursor.fetchone()[0]
 
     print(f"Database stats: {total_articles} total articles, {new_today} new today")
@@ -392,21 +478,88 @@ def fetch_all_sources():
     print("Fetch complete!")
 
 
-# Schedule automatic runs
-def setup_schedule():
-    # Run every 6 hours
-    schedule.every(6).hours.do(fetch_all_sources)
+# Per-source conditional fetch counters since the last report (also on /metrics as newshub_fetch_*)
+def print_fetch_stats(stats):
+    for source, counts in sorted(stats.items()):
+        print(f"{source}: {counts['bytes_downloaded']} bytes downloaded, "
+              f"{counts['not_modified']} not modified ({counts['bytes_saved']} bytes saved, "
+              f"{counts['skipped_parses']} parses skipped), "
+              f"{counts['duplicates_skipped']} already-seen items skipped")
 
-    print("Scheduler started. Press Ctrl+C to exit.")
 
-    # Run once immediately
-    fetch_all_sources()
+# Poll each source on its own adaptive interval (see scheduler.py)
+def setup_schedule():
+    conn, cursor = setup_database()
 
-    # Keep running
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    with ParsePool() as parse_pool, FetchEngine(validators=load_validators(cursor), parse_pool=parse_pool) as engine:
+        def on_result(name, records):
+            # The dedup filter may have been rebuilt since the last fetch
+            engine.dedup = get_url_dedup(cursor)
+            return len(ingest_result(conn, cursor, engine, name, records))
+
+        scheduler = SourceScheduler(
+            conn, engine, {name: source.policy() for name, source in get_sources().items()},
+            make_job=lambda name: make_job(name, cursor),
+            on_result=on_result,
+            after_results=lambda: after_fetch(conn, cursor, engine)
+        )
+        engine.dedup = get_url_dedup(cursor)
+
+        print("Scheduler started. Press Ctrl+C to exit.")
+        try:
+            scheduler.run_forever()
+        finally:
+            conn.close()
 
 
 if __name__ == "__main__":
-    setup_schedule()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Personal news aggregator")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "once", "rebuild-search", "rebuild-stats", "rebuild-hot",
+                                                               "backfill-arxiv", "cluster", "archive"],
+                        help="run the scheduler (default), fetch every source once, "
+                             "rebuild the search index, stats rollups or hot ranking, "
+                             "backfill ArXiv history, cluster recent articles into stories, "
+                             "or archive expired articles now and compact the database")
+    parser.add_argument("--max-papers", type=int, default=10000, help="upper bound for backfill-arxiv")
+    parser.add_argument("--sources", help="sources config to use instead of sources.toml")
+    args = parser.parse_args()
+    metrics.configure_logging()
+    if args.sources:
+        use_sources_config(args.sources)
+
+    if args.command == "rebuild-search":
+        conn, cursor = setup_database()
+        rebuild_search_index(conn)
+        conn.close()
+        print("Search index rebuilt")
+    elif args.command == "rebuild-stats":
+        conn, cursor = setup_database()
+        rebuild_stats(conn)
+        conn.close()
+        print("Stats rollups rebuilt")
+    elif args.command == "rebuild-hot":
+        conn, cursor = setup_database()
+        ranked = rebuild_rankings(conn, source_weights())
+        conn.close()
+        print(f"Hot ranking rebuilt with {ranked} articles")
+    elif args.command == "backfill-arxiv":
+        conn, cursor = setup_database()
+        added = backfill_arxiv(conn, cursor, args.max_papers)
+        conn.close()
+        print(f"ArXiv backfill complete: {added} new papers")
+    elif args.command == "cluster":
+        conn, cursor = setup_database()
+        joined = cluster_backfill(conn)
+        conn.close()
+        print(f"Clustering complete: {joined} articles joined an existing story")
+    elif args.command == "archive":
+        conn, cursor = setup_database()
+        archived = run_retention(conn, get_retention_policy(), force=True)
+        conn.close()
+        for source, count in sorted(archived.items()):
+            print(f"{source}: {count} articles archived")
+        print(f"Archive complete: {sum(archived.values())} articles moved to {database.archive_path()}")
+    elif args.command == "once":
+        fetch_all_sources()
+    else:
+        setup_schedule()
\ No newline at end of file
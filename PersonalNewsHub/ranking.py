@@ -0,0 +1,125 @@
+"""Engagement score snapshots and the "hot" front-page ranking.
+
+Every fetch reports the HackerNews points and Reddit scores of all items it
+saw, new or already stored. A change from an article's last reading is
+appended to score_snapshots (article id, epoch seconds, score).
+
+An article's hot value is
+
+    log10(weight * (score + 1)) + first_seen / HOT_DECAY
+
+where ``weight`` is its source's ``weight`` in sources.toml (default 1) and
+``first_seen`` is its added_date in epoch seconds. Ten times the engagement
+is worth HOT_DECAY seconds of freshness. Since the time term is fixed when
+an article arrives, its hot value only changes when its score does. So the
+HOT_SIZE best articles can be kept in hot_articles incrementally: each
+fetch re-scores just the articles it touched and trims the list, and the
+dashboard reads a ready-made ranking.
+"""
+import heapq
+import math
+import time
+
+from dedup import clean_url
+from ingest import bump_data_version
+from sources import source_setting
+
+HOT_DECAY = 45000  # 12.5 hours
+HOT_SIZE = 500
+
+# Keeps IN (...) lists below SQLite's bound-parameter limit
+CHUNK = 500
+
+
+def hot_score(score, first_seen, weight=1.0):
+    return math.log10(weight * (max(score or 0, 0) + 1)) + first_seen / HOT_DECAY
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK):
+        yield items[start:start + CHUNK]
+
+
+def latest_scores(conn, article_ids):
+    scores = {}
+    for chunk in _chunks(article_ids):
+        scores.update(conn.execute(f'''
+            SELECT s.article_id, s.score FROM score_snapshots s
+            WHERE s.article_id IN ({",".join("?" * len(chunk))})
+              AND s.observed = (SELECT MAX(observed) FROM score_snapshots WHERE article_id = s.article_id)
+        ''', chunk).fetchall())
+    return scores
+
+
+def update_rankings(conn, added, scores, weights, now=None):
+    """Store new score readings and re-rank the articles they or ``added`` touch.
+
+    ``added`` are records just inserted (with ``id``); ``scores`` are
+    ``(url, score)`` readings from the fetch. Returns how many articles
+    entered or moved in the hot list; the data version is bumped if any did.
+    """
+    observed = {}
+    for url, score in scores:
+        if score is not None:
+            observed[clean_url(url)] = int(score)
+    new_ids = {record["id"] for record in added}
+    urls = observed.keys() | {record["url"] for record in added}
+    if not urls:
+        return 0
+
+    articles = []
+    for chunk in _chunks(urls):
+        articles += conn.execute(f'''
+            SELECT id, url, source, CAST(strftime('%s', added_date) AS INTEGER) FROM articles
+            WHERE url IN ({",".join("?" * len(chunk))})
+        ''', chunk).fetchall()
+    previous = latest_scores(conn, [article_id for article_id, *_ in articles])
+
+    now = int(now or time.time())
+    snapshots, ranked = [], []
+    for article_id, url, source, first_seen in articles:
+        score = observed.get(url)
+        if score is not None and score != previous.get(article_id):
+            snapshots.append((article_id, now, score))
+        elif article_id not in new_ids:
+            continue  # Hot value unchanged
+        else:
+            score = previous.get(article_id, 0)
+        ranked.append((article_id, hot_score(score, first_seen, source_setting(weights, source, 1.0)), score))
+
+    conn.executemany("INSERT OR REPLACE INTO score_snapshots (article_id, observed, score) VALUES (?, ?, ?)",
+                     snapshots)
+    if ranked:
+        conn.executemany("INSERT OR REPLACE INTO hot_articles (article_id, hot, score) VALUES (?, ?, ?)", ranked)
+        trim_hot(conn)
+        bump_data_version(conn)
+    conn.commit()
+    return len(ranked)
+
+
+def trim_hot(conn, size=HOT_SIZE):
+    conn.execute('''
+        DELETE FROM hot_articles WHERE hot < (
+            SELECT hot FROM hot_articles ORDER BY hot DESC LIMIT 1 OFFSET ?
+        )
+    ''', (size - 1,))
+
+
+def rebuild_rankings(conn, weights, size=HOT_SIZE):
+    """Recompute the hot list from every article's latest score, e.g. after changing weights."""
+    rows = conn.execute('''
+        SELECT a.id, a.source, CAST(strftime('%s', a.added_date) AS INTEGER),
+               (SELECT s.score FROM score_snapshots s WHERE s.article_id = a.id ORDER BY s.observed DESC LIMIT 1)
+        FROM articles a
+    ''')
+    best = heapq.nlargest(size, (
+        (hot_score(score, first_seen, source_setting(weights, source, 1.0)), article_id, score or 0)
+        for article_id, source, first_seen, score in rows
+    ))
+    conn.execute("DELETE FROM hot_articles")
+    conn.executemany("INSERT INTO hot_articles (article_id, hot, score) VALUES (?, ?, ?)",
+                     [(article_id, hot, score) for hot, article_id, score in best])
+    bump_data_version(conn)
+    conn.commit()
+    return len(best)
@@ -0,0 +1,99 @@
+import functools
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import make_response, request
+
+
+class ResponseCache:
+    """In-process LRU cache of rendered Flask responses.
+
+    Entries are keyed by route path and normalized query args and tagged with
+    the data version they were rendered at. The ingestion pipeline bumps that
+    version after every commit, so a stale entry is simply re-rendered on its
+    next hit. Cached pages carry an ETag, so browsers revalidate with a 304.
+    """
+
+    def __init__(self, version_fn, max_entries=256, max_bytes=32 * 1024 * 1024, version_ttl=2.0):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # How long a data version read is trusted before asking the database again
+        self.version_ttl = version_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+
+    def current_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked < self.version_ttl:
+                return self._version
+        version = self.version_fn()
+        with self._lock:
+            self._version = version
+            self._version_checked = now
+        return version
+
+    @staticmethod
+    def make_key():
+        args = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v != ''))
+        return request.path, args
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, etag, mimetype):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (version, body, etag, mimetype)
+            self._size += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._version = None
+
+    def cached(self, view):
+        """Decorator for GET views whose output depends only on path, args and data."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = self.current_version()
+            key = self.make_key()
+
+            entry = self.get(key, version)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                etag = f"{version}-{zlib.crc32(body):08x}"
+                self.put(key, version, body, etag, response.mimetype)
+            else:
+                _, body, etag, mimetype = entry
+                response = make_response(body)
+                response.mimetype = mimetype
+
+            response.set_etag(etag)
+            return response.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,178 @@
+"""Retention: move old articles into an archive database and compact the live one.
+
+The dashboard only ever reads recent articles, so the live database keeps a
+bounded window and everything older moves to an archive database (see
+database.archive_path). The policy comes from the [retention] table of
+sources.toml:
+
+    days            articles older than this are archived (0 keeps them forever)
+    max_articles    most articles kept live; the oldest beyond it are archived (0: no limit)
+    interval_hours  how often the fetcher runs retention
+    vacuum_pages    most free pages handed back to the filesystem per fetch cycle
+
+and a source's ``retain_days`` overrides ``days`` for its own articles.
+
+The archive is attached to the writer connection only while a run moves
+rows. An archived row keeps the article's columns plus its tag names and
+last score, with the summary zlib-compressed (see unpack_summary). Each
+batch is first copied and committed, then deleted from the live tables,
+whose triggers update the stats, tag counts, search index and hot list.
+A crash between the two commits leaves the batch in both databases, and
+the next run copies it again with INSERT OR REPLACE and deletes it. A run
+that moved anything ends by optimizing the full-text index.
+
+The live database uses auto_vacuum=INCREMENTAL. Freed pages are returned
+``vacuum_pages`` at a time after each fetch, so the file shrinks without a
+full VACUUM blocking the writer.
+"""
+import time
+import zlib
+from collections import Counter
+
+import database
+import metrics
+from ingest import TAGS_SQL, bump_data_version
+from sources import source_setting
+
+DEFAULT_POLICY = {
+    "days": 90,
+    "max_articles": 0,
+    "interval_hours": 24,
+    "vacuum_pages": 2048,  # 8 MiB of 4 KiB pages
+}
+
+# Articles copied and deleted per transaction
+BATCH = 2000
+
+ARCHIVE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS archive.articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    published_date TEXT,
+    summary BLOB,
+    category TEXT,
+    added_date TEXT,
+    cluster_id INTEGER,
+    tags TEXT,
+    score INTEGER,
+    archived_date TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS archive.idx_articles_url ON articles (url);
+CREATE INDEX IF NOT EXISTS archive.idx_articles_source_added ON articles (source, added_date);
+'''
+
+
+def pack_summary(text):
+    return None if text is None else zlib.compress(text.encode("utf-8"), 9)
+
+
+def unpack_summary(blob):
+    return None if blob is None else zlib.decompress(blob).decode("utf-8")
+
+
+def retention_policy(settings, source_days):
+    """The [retention] settings over DEFAULT_POLICY, plus ``sources``: configured source -> retain_days."""
+    policy = dict(DEFAULT_POLICY, **settings)
+    policy["sources"] = {name: days for name, days in source_days.items() if days is not None}
+    return policy
+
+
+def expired(conn, policy, limit=BATCH):
+    """Up to ``limit`` (id, source) rows past their source's age, or past max_articles."""
+    rows = []
+    for (source,) in conn.execute("SELECT source FROM stats_source").fetchall():
+        days = source_setting(policy["sources"], source, policy["days"])
+        if days and len(rows) < limit:
+            rows += conn.execute('''
+                SELECT id, source FROM articles
+                WHERE source = ? AND added_date < DATETIME('now', ?)
+                ORDER BY added_date LIMIT ?
+            ''', (source, f"-{days} days", limit - len(rows))).fetchall()
+    if not rows and policy["max_articles"]:
+        live = conn.execute("SELECT IFNULL(SUM(count), 0) FROM stats_source").fetchone()[0]
+        excess = min(live - policy["max_articles"], limit)
+        if excess > 0:
+            # Ids are AUTOINCREMENT, so the lowest are the oldest
+            rows = conn.execute("SELECT id, source FROM articles ORDER BY id LIMIT ?", (excess,)).fetchall()
+    return rows
+
+
+def archive_batch(conn, ids):
+    conn.execute("DELETE FROM temp.retention_ids")
+    conn.executemany("INSERT INTO temp.retention_ids (id) VALUES (?)", [(article_id,) for article_id in ids])
+    conn.execute(f'''
+        INSERT OR REPLACE INTO archive.articles
+            (id, title, url, source, published_date, summary, category, added_date, cluster_id, tags, score)
+        SELECT a.id, a.title, a.url, a.source, a.published_date, pack_summary(a.summary), a.category,
+               a.added_date, a.cluster_id, {TAGS_SQL},
+               (SELECT s.score FROM score_snapshots s WHERE s.article_id = a.id ORDER BY s.observed DESC LIMIT 1)
+        FROM temp.retention_ids r JOIN articles a ON a.id = r.id
+    ''')
+    conn.commit()
+
+    conn.execute("DELETE FROM article_tags WHERE article_id IN (SELECT id FROM temp.retention_ids)")
+    conn.execute("DELETE FROM article_minhash WHERE article_id IN (SELECT id FROM temp.retention_ids)")
+    conn.execute("DELETE FROM articles WHERE id IN (SELECT id FROM temp.retention_ids)")
+    bump_data_version(conn)
+    conn.commit()
+
+
+def archive_expired(conn, policy, path=None):
+    """Move every expired article to the archive; returns a Counter of articles moved per source."""
+    conn.commit()  # ATTACH cannot run inside a transaction
+    conn.create_function("pack_summary", 1, pack_summary, deterministic=True)
+    conn.execute("ATTACH DATABASE ? AS archive", (path or database.archive_path(),))
+    moved = Counter()
+    try:
+        conn.executescript(ARCHIVE_SCHEMA)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_ids (id INTEGER PRIMARY KEY)")
+        while True:
+            rows = expired(conn, policy)
+            if not rows:
+                break
+            archive_batch(conn, [article_id for article_id, _ in rows])
+            moved.update(source for _, source in rows)
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DETACH DATABASE archive")
+
+    if moved:
+        # Deleting from the full-text index only appends tombstones; merging its
+        # segments drops them along with the deleted rows' entries
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+        conn.commit()
+    for source, count in moved.items():
+        metrics.inc("newshub_articles_archived_total", count, source=source)
+    return moved
+
+
+def incremental_vacuum(conn, pages):
+    """Return up to ``pages`` free pages to the filesystem (all of them if ``pages`` is None)."""
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if not free or pages == 0:
+        return 0
+    # executescript steps the pragma to completion; execute() would free a single page
+    conn.executescript("PRAGMA incremental_vacuum" + ("" if pages is None else f"({int(pages)})"))
+    vacuumed = free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    metrics.inc("newshub_pages_vacuumed_total", vacuumed)
+    return vacuumed
+
+
+def run_retention(conn, policy, force=False, now=None):
+    """Archive expired articles if ``interval_hours`` have passed since the last run, then vacuum a slice.
+
+    Returns the Counter of archived articles per source (empty when not due).
+    """
+    now = int(now or time.time())
+    moved = Counter()
+    row = conn.execute("SELECT value FROM app_state WHERE key = 'retention_last_run'").fetchone()
+    if force or row is None or now - row[0] >= policy["interval_hours"] * 3600:
+        moved = archive_expired(conn, policy)
+        conn.execute("INSERT OR REPLACE INTO app_state (key, value) VALUES ('retention_last_run', ?)", (now,))
+        conn.commit()
+        metrics.log_event("retention", archived=sum(moved.values()), sources=dict(moved))
+    incremental_vacuum(conn, None if force else policy["vacuum_pages"])
+    return moved
@@ -0,0 +1,163 @@
+import heapq
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+# Polling bounds in seconds; a source's interval adapts between them
+DEFAULT_INTERVAL = 60 * 60
+MIN_INTERVAL = 10 * 60
+MAX_INTERVAL = 12 * 60 * 60
+
+# A poll that finds about this many new items is polling at the right rate:
+# roughly half of what one poll can see, so nothing scrolls away unseen.
+# Sources override it and the interval bounds in sources.toml.
+TARGET_NEW_ITEMS = 8
+
+# Retry delay after the first failure, doubled per consecutive failure
+ERROR_BACKOFF = 60
+MAX_BACKOFF = 6 * 60 * 60
+
+# Spread of each next-due time, so sources do not fire in lockstep
+JITTER = 0.1
+
+
+def source_policy(overrides=None):
+    policy = {"min_interval": MIN_INTERVAL, "max_interval": MAX_INTERVAL, "target": TARGET_NEW_ITEMS}
+    policy.update(overrides or {})
+    return policy
+
+
+def next_interval(interval, new_items, policy):
+    """Scale the polling interval toward ``policy["target"]`` new items per poll.
+
+    A poll with nothing new doubles the interval. A poll with more than the
+    target shortens it in proportion. The change is limited to a factor of 2
+    per poll and clamped to the policy's min and max interval.
+    """
+    factor = 2.0 if new_items == 0 else policy["target"] / new_items
+    factor = min(2.0, max(0.5, factor))
+    return min(policy["max_interval"], max(policy["min_interval"], interval * factor))
+
+
+def backoff_delay(failures):
+    # Exponential backoff with "equal jitter": half fixed, half random
+    delay = min(MAX_BACKOFF, ERROR_BACKOFF * 2 ** (failures - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def jittered(interval):
+    return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class SourceScheduler:
+    """Polls every source on its own adaptive interval instead of one fixed cycle.
+
+    ``sources`` maps each source name to its policy overrides (see
+    ``source_policy``). Next-due times live in a heap. Every source that is
+    due is submitted to the FetchEngine pool, so a slow or failing feed
+    never holds up the others. Results are handled on the calling thread by ``on_result(name,
+    records)``, which returns how many items were new. That count drives
+    ``next_interval``. A fetch that raises is retried with exponential
+    backoff and jitter. Intervals and due times are kept in the
+    source_schedule table, so what was learned survives a restart.
+    """
+
+    def __init__(self, conn, engine, sources, make_job, on_result, after_results=None):
+        self.conn = conn
+        self.engine = engine
+        self.make_job = make_job
+        self.on_result = on_result
+        # Called after each batch of finished fetches (save validators, export, ...)
+        self.after_results = after_results
+        self.state = {}
+        self._heap = []
+        self._running = {}
+        self._load(sources)
+
+    def _load(self, sources):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT source, interval, next_due, failures FROM source_schedule")
+        stored = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        now = time.time()
+        for name, overrides in sources.items():
+            interval, next_due, failures = stored.get(name, (DEFAULT_INTERVAL, None, 0))
+            policy = source_policy(overrides)
+            interval = min(policy["max_interval"], max(policy["min_interval"], interval))
+            if next_due is None:
+                next_due = now + random.uniform(0, 5)  # New source: due now, lightly staggered
+            self.state[name] = {"interval": interval, "failures": failures, "next_due": next_due, "policy": policy}
+            heapq.heappush(self._heap, (next_due, name))
+
+    def _save(self, name):
+        state = self.state[name]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO source_schedule (source, interval, next_due, failures, updated_date) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (name, state["interval"], state["next_due"], state["failures"])
+        )
+        self.conn.commit()
+
+    def _reschedule(self, name, delay):
+        state = self.state[name]
+        state["next_due"] = time.time() + delay
+        heapq.heappush(self._heap, (state["next_due"], name))
+        self._save(name)
+
+    def record_success(self, name, new_items):
+        state = self.state[name]
+        state["failures"] = 0
+        state["interval"] = next_interval(state["interval"], new_items, state["policy"])
+        self._reschedule(name, jittered(state["interval"]))
+        print(f"{name}: {new_items} new, next poll in {state['interval'] / 60:.0f} min")
+
+    def record_failure(self, name, error):
+        state = self.state[name]
+        state["failures"] += 1
+        delay = backoff_delay(state["failures"])
+        self._reschedule(name, delay)
+        print(f"Error fetching {name} (failure {state['failures']}): {error}; retrying in {delay / 60:.1f} min")
+
+    def start_due(self):
+        # Submit every source whose time has come and is not already in flight
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, name = heapq.heappop(self._heap)
+            if name in self._running.values():
+                continue
+            try:
+                job = self.make_job(name)
+            except Exception as e:
+                self.record_failure(name, e)
+                continue
+            self._running[self.engine.submit(name, job)] = name
+
+    def run_once(self, timeout=None):
+        """Start due sources and handle whatever finishes within ``timeout`` seconds."""
+        self.start_due()
+
+        if self._heap:
+            until_due = max(0.0, self._heap[0][0] - time.time())
+            timeout = until_due if timeout is None else min(timeout, until_due)
+        if not self._running:
+            time.sleep(timeout or 0)
+            return 0
+
+        done, _ = wait(list(self._running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = self._running.pop(future)
+            try:
+                new_items = self.on_result(name, future.result())
+            except Exception as e:
+                self.record_failure(name, e)
+            else:
+                self.record_success(name, new_items)
+
+        if done and self.after_results is not None:
+            self.after_results()
+        return len(done)
+
+    def run_forever(self):
+        while True:
+            self.run_once(timeout=60)
@@ -0,0 +1,70 @@
+"""Source-specific download and parsing helpers for the news aggregator.
+
+Sources are declared in sources.toml. Each entry's ``type`` maps to a
+Source subclass through SOURCE_TYPES, and a type's module is only
+imported when a configured source uses it.
+"""
+import importlib
+import os
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+
+SOURCES_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sources.toml")
+
+# Source type -> "module:Class"
+SOURCE_TYPES = {
+    "rss": "sources.rss:RssSource",
+    "hackernews": "sources.hackernews:HackerNewsSource",
+    "reddit": "sources.reddit:RedditSource",
+    "arxiv": "sources.arxiv:ArxivSource",
+}
+
+
+def source_class(type_name):
+    try:
+        module_name, class_name = SOURCE_TYPES[type_name].split(":")
+    except KeyError:
+        raise ValueError(f"Unknown source type: {type_name}") from None
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def source_setting(values, source, default=None):
+    """The value in ``values`` (configured source name -> value) for articles stored under ``source``.
+
+    Reddit articles are stored as "Reddit/r/<subreddit>" under the "Reddit"
+    source, so a missing name falls back to its part before the first "/".
+    """
+    value = values.get(source)
+    if value is None:
+        value = values.get(source.split("/", 1)[0], default)
+    return value
+
+
+def load_retention(path=SOURCES_CONFIG_PATH):
+    """The [retention] table of the config file (see retention.py), or {} if it has none."""
+    with open(path, "rb") as f:
+        return tomllib.load(f).get("retention", {})
+
+
+def load_sources(path=SOURCES_CONFIG_PATH):
+    """Build the Source objects listed under [[source]] in the config file, in order."""
+    with open(path, "rb") as f:
+        config = tomllib.load(f)
+
+    sources = []
+    names = set()
+    for entry in config.get("source", []):
+        entry = dict(entry)
+        type_name = entry.pop("type")
+        if entry.get("enabled", True) is False:
+            continue
+        entry.pop("enabled", None)
+        if entry["name"] in names:
+            raise ValueError(f"Duplicate source name in {path}: {entry['name']}")
+        names.add(entry["name"])
+        sources.append(source_class(type_name)(**entry))
+    return sources
@@ -0,0 +1,164 @@
+import io
+import re
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode
+
+from sources.base import Source, extract_tags
+
+
+ARXIV_API = "http://export.arxiv.org/api/query"
+CATEGORIES = ["cs.AI", "cs.LG", "cs.CL"]  # AI, Machine Learning, Computational Linguistics
+
+# arXiv asks API clients to wait 3 seconds between consecutive calls
+RATE_LIMIT_DELAY = 3.0
+PAGE_SIZE = 100
+# Most papers one poll walks before it gives up on reaching known ones; a
+# day's announcement in the default categories is well under this
+MAX_PAPERS = 2000
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def query_url(categories=CATEGORIES, start=0, max_results=PAGE_SIZE, api=ARXIV_API):
+    params = {
+        "search_query": " OR ".join(f"cat:{category}" for category in categories),
+        "start": start,
+        "max_results": max_results,
+        "sortBy": "submittedDate",
+        "sortOrder": "descending"
+    }
+    return f"{api}?{urlencode(params)}"
+
+
+def _text(entry, tag):
+    element = entry.find(ATOM + tag)
+    return " ".join(element.text.split()) if element is not None and element.text else ""
+
+
+def iter_entries(stream):
+    """Parse an Atom response incrementally, yielding one paper dict per <entry>.
+
+    Each entry is converted and then cleared from the tree, so memory stays
+    flat however many entries the response holds.
+    """
+    root = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end" or element.tag != ATOM + "entry":
+            continue
+
+        yield {
+            "title": _text(element, "title"),
+            "url": _text(element, "id"),
+            "published": _text(element, "published"),
+            "summary": _text(element, "summary"),
+            "categories": [c.get("term") for c in element.findall(ATOM + "category") if c.get("term")]
+        }
+        element.clear()
+        root.clear()
+
+
+def parse_page(body):
+    return list(iter_entries(io.BytesIO(body)))
+
+
+def iter_pages(engine, categories=CATEGORIES, page_size=PAGE_SIZE, max_results=None, delay=RATE_LIMIT_DELAY, start=0,
+               parse_page=parse_page, api=ARXIV_API):
+    """Yield lists of papers page by page, newest submissions first.
+
+    The first page is fetched conditionally; ``None`` is yielded if it has
+    not changed since the last run. Pages are requested ``delay`` seconds
+    apart and paging stops at an empty page or after ``max_results`` papers.
+    Each page's bytes are handed to ``parse_page``, which may send them to
+    the parse pool. The caller can stop early simply by no longer iterating.
+    """
+    offset = start
+    while max_results is None or offset - start < max_results:
+        size = page_size if max_results is None else min(page_size, max_results - (offset - start))
+        url = query_url(categories, offset, size, api)
+
+        if offset == 0:
+            response = engine.get_conditional(url)
+            if response is None:
+                yield None
+                return
+        else:
+            time.sleep(delay)
+            response = engine.get(url)
+            response.raise_for_status()
+
+        papers = parse_page(response.content)
+        if not papers:
+            return
+
+        yield papers
+        offset += len(papers)
+
+
+def arxiv_id(url):
+    # "http://arxiv.org/abs/2410.01234v2" -> "2410.01234": every version is the same paper
+    return re.sub(r"v\d+$", "", url.rsplit("/abs/", 1)[-1])
+
+
+def paper_record(paper, settings):
+    summary = paper["summary"][:500]  # Limit summary length
+
+    # ArXiv categories become tags, plus anything extracted from the title and abstract
+    tags = paper["categories"] + extract_tags(paper["title"], summary)
+
+    return {
+        "title": paper["title"],
+        "url": paper["url"],
+        "source": settings["name"],
+        "published_date": paper["published"],
+        "summary": summary,
+        "category": settings["category"],
+        "tags": tags,
+        "external_id": ("arxiv", arxiv_id(paper["url"]))
+    }
+
+
+def parse_records(body, settings):
+    return [paper_record(paper, settings) for paper in parse_page(body)]
+
+
+class ArxivSource(Source):
+    """Newest submissions in ``categories``, paged until a page of already-known papers.
+
+    arXiv announces a day's papers at once, so one poll may find hundreds of
+    new ones; it walks as many pages as that takes, up to ``max_papers``
+    (MAX_PAPERS), rather than stopping at ``limit``. A paper is known by its
+    arXiv id (any version) or its URL, not by date: announced papers can
+    carry submission dates older than ones already stored.
+    """
+
+    type = "arxiv"
+    parse = staticmethod(parse_records)
+    known_namespace = "arxiv"
+
+    def iter_records(self, engine, known_ids=frozenset(), max_results=None, start=0):
+        """Yield each page's unseen records, newest first, up to the first page with none."""
+        pages = iter_pages(
+            engine, self.settings.get("categories", CATEGORIES),
+            max_results=max_results, start=start,
+            parse_page=lambda body: engine.parse(parse_records, body, self.settings),
+            api=self.settings.get("url", ARXIV_API)
+        )
+        for records in pages:
+            if records is None:
+                return  # Not modified since the last poll
+
+            batch = [record for record in records
+                     if record["external_id"][1] not in known_ids and not engine.is_seen(record["url"])]
+            if not batch:
+                return  # Reached papers stored by an earlier poll
+            yield batch
+
+    def fetch(self, engine, state=None):
+        records = []
+        for batch in self.iter_records(engine, state or frozenset(),
+                                       max_results=self.settings.get("max_papers", MAX_PAPERS)):
+            records.extend(batch)
+        return records
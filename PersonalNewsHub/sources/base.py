@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import metrics
+from tagging import get_extractor
+
+
+# Helper: Extract potential tags from text (vocabulary lives in tag_vocabulary.txt)
+def extract_tags(*texts):
+    with metrics.span("tag"):
+        return get_extractor().extract(*texts)
+
+
+def now_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Source:
+    """One configured source: fetch raw bytes, parse them into records.
+
+    A subclass sets ``type`` (the name used in sources.toml) and ``parse``, a
+    module-level function ``parse(body, settings)`` that turns one response
+    body into record dicts. Because it is a plain function of bytes and a
+    dict, ``engine.parse`` can run it in a ParsePool worker process.
+    ``fetch`` drives the download; the default handles a single
+    conditionally fetched URL and drops records whose URL was already seen.
+    Sources that page (HackerNews, Reddit, ArXiv) override it.
+
+    Every key of the source's config table is kept in ``settings``. The
+    common ones are ``name``, ``category``, ``limit`` (most items taken per
+    poll), ``weight`` (see ranking.py), ``retain_days`` (see retention.py)
+    and the scheduler's ``min_interval``, ``max_interval`` (minutes) and
+    ``target``.
+    """
+
+    type = None
+    parse = None
+    # known_items namespace of the ids a paging fetch stops at, see prepare
+    known_namespace = None
+
+    def __init__(self, name, category="", limit=None, **settings):
+        self.name = name
+        self.category = category
+        self.limit = limit
+        self.settings = dict(settings, name=name, category=category, limit=limit)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r}>"
+
+    def url(self):
+        return self.settings["url"]
+
+    def prepare(self, cursor):
+        """Read whatever database state the next fetch needs (runs on the writer thread).
+
+        With a ``known_namespace`` that is the ids already ingested under it,
+        newest ``known_ids`` (default 20000) first, for the early-stop check.
+        """
+        if self.known_namespace is None:
+            return None
+        cursor.execute(
+            "SELECT item_id FROM known_items WHERE namespace = ? ORDER BY rowid DESC LIMIT ?",
+            (self.known_namespace, self.settings.get("known_ids", 20000))
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def fetch(self, engine, state=None):
+        response = engine.get_conditional(self.url())
+        if response is None:
+            return []  # Not modified since the last poll
+        records = engine.parse(type(self).parse, response.content, self.settings)
+        return [record for record in records if not engine.is_seen(record["url"])]
+
+    def weight(self):
+        """Multiplier on this source's engagement in the hot ranking."""
+        weight = float(self.settings.get("weight", 1.0))
+        if weight <= 0:
+            raise ValueError(f"Source {self.name!r} needs a positive weight, got {weight}")
+        return weight
+
+    def retain_days(self):
+        """Days this source's articles stay in the live database; None uses the [retention] default."""
+        days = self.settings.get("retain_days")
+        if days is not None and days < 0:
+            raise ValueError(f"Source {self.name!r} needs a retain_days of 0 or more, got {days}")
+        return days
+
+    def policy(self):
+        """Scheduler bounds from the config, converted from minutes to seconds."""
+        policy = {}
+        for key in ("min_interval", "max_interval"):
+            if self.settings.get(key) is not None:
+                policy[key] = self.settings[key] * 60
+        if self.settings.get("target") is not None:
+            policy["target"] = self.settings["target"]
+        return policy
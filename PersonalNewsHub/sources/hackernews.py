@@ -0,0 +1,155 @@
+import importlib.util
+from urllib.parse import urljoin
+
+from sources.base import Source, extract_tags, now_timestamp
+
+
+HN_URL = "https://news.ycombinator.com/"
+
+
+def _points(text):
+    # "123 points" -> 123; job posts and odd rows have no score
+    head = text.strip().split(" ", 1)[0]
+    return int(head) if head.isdigit() else 0
+
+
+def _items(rows, scores, base_url):
+    items = []
+    for item_id, title, link in rows:
+        if not title:
+            continue
+        items.append({
+            "id": item_id,
+            "title": title.strip(),
+            "url": urljoin(base_url, link or ""),
+            "points": scores.get(item_id, 0)
+        })
+    return items
+
+
+def _parse_selectolax(html, base_url):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    rows = []
+    for row in tree.css("tr.athing"):
+        link = row.css_first(".titleline > a")
+        if link is not None:
+            rows.append((row.attributes.get("id"), link.text(), link.attributes.get("href")))
+    scores = {
+        span.attributes.get("id", "")[len("score_"):]: _points(span.text())
+        for span in tree.css("span.score")
+    }
+    return _items(rows, scores, base_url)
+
+
+def _parse_lxml(html, base_url):
+    from lxml import html as lxml_html
+
+    doc = lxml_html.fromstring(html)
+    rows = []
+    for row in doc.find_class("athing"):
+        if row.tag != "tr":
+            continue
+        links = row.xpath('.//span[contains(concat(" ", @class, " "), " titleline ")]/a[1]')
+        if links:
+            rows.append((row.get("id"), links[0].text_content(), links[0].get("href")))
+    scores = {
+        span.get("id", "")[len("score_"):]: _points(span.text_content())
+        for span in doc.find_class("score")
+    }
+    return _items(rows, scores, base_url)
+
+
+def _parse_bs4(html, base_url):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for row in soup.select("tr.athing"):
+        link = row.select_one(".titleline > a")
+        if link is not None:
+            rows.append((row.get("id"), link.text, link.get("href")))
+    scores = {span.get("id", "")[len("score_"):]: _points(span.text) for span in soup.select("span.score")}
+    return _items(rows, scores, base_url)
+
+
+# Fastest first; each entry is (backend name, module it needs, parse function)
+BACKENDS = [
+    ("selectolax", "selectolax", _parse_selectolax),
+    ("lxml", "lxml", _parse_lxml),
+    ("html.parser", "bs4", _parse_bs4),
+]
+
+
+def available_backends():
+    return [name for name, module, _ in BACKENDS if importlib.util.find_spec(module) is not None]
+
+
+def parse_front_page(html, base_url=HN_URL, backend=None):
+    """Parse a HackerNews listing page into ``{"id", "title", "url", "points"}`` dicts.
+
+    Title rows and score spans are each collected in one pass and joined on
+    the item id, so the cost is linear in page size. ``backend`` picks a
+    parser by name; by default the fastest installed one is used.
+    """
+    for name, module, parse in BACKENDS:
+        if backend is None and importlib.util.find_spec(module) is None:
+            continue
+        if backend in (None, name):
+            return parse(html, base_url)
+    raise ValueError(f"Unknown or unavailable HTML backend: {backend}")
+
+
+def page_url(page, base_url=HN_URL):
+    return base_url if page == 1 else urljoin(base_url, f"news?p={page}")
+
+
+def parse_records(html, settings):
+    records = []
+    for item in parse_front_page(html, settings.get("url", HN_URL), settings.get("backend")):
+        records.append({
+            "title": item["title"],
+            "url": item["url"],
+            "source": settings["name"],
+            "published_date": now_timestamp(),
+            "category": settings["category"],
+            "tags": extract_tags(item["title"]),
+            "score": item["points"]
+        })
+    return records
+
+
+class HackerNewsSource(Source):
+    """The HackerNews front page, walking ``?p=2..pages`` until ``limit`` new posts are found."""
+
+    type = "hackernews"
+    parse = staticmethod(parse_records)
+
+    def fetch(self, engine, state=None):
+        limit = self.limit or 30
+        base_url = self.settings.get("url", HN_URL)
+
+        records = []
+        seen = set()
+        for page in range(1, self.settings.get("pages", 1) + 1):
+            response = engine.get_conditional(page_url(page, base_url))
+            if response is None:
+                break  # Not modified since the last poll
+
+            items = engine.parse(parse_records, response.content, self.settings)
+            if not items:
+                break
+            # Points of stories already stored still feed the hot ranking
+            engine.observe_scores((item["url"], item["score"]) for item in items)
+
+            for item in items:
+                if item["url"] in seen or engine.is_seen(item["url"]):
+                    continue
+                seen.add(item["url"])
+                records.append(item)
+
+            if len(records) >= limit:
+                break
+
+        return records[:limit]
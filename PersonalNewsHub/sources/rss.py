@@ -0,0 +1,32 @@
+import feedparser
+
+from sources.base import Source, extract_tags, now_timestamp
+
+
+DEFAULT_LIMIT = 15
+
+
+def parse_records(body, settings):
+    news_feed = feedparser.parse(body)
+
+    records = []
+    for entry in news_feed.entries[:settings["limit"] or DEFAULT_LIMIT]:  # Most recent entries only
+        title = entry.title
+        summary = entry.get("summary", "")[:500]  # Limit summary length
+        records.append({
+            "title": title,
+            "url": entry.link,
+            "source": settings["name"],
+            "published_date": entry.get("published", now_timestamp()),
+            "summary": summary,
+            "category": settings["category"],
+            "tags": extract_tags(title, summary)
+        })
+    return records
+
+
+class RssSource(Source):
+    """An RSS or Atom feed at ``url``; feedparser runs in the parse pool on the raw bytes."""
+
+    type = "rss"
+    parse = staticmethod(parse_records)
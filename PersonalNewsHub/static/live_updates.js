@@ -0,0 +1,86 @@
+// Adds articles pushed by /events (see live_updates.py) to the top of the
+// page's #articles list, built the same way as the server-rendered cards.
+(function () {
+    var list = document.getElementById('articles');
+    if (!list || !list.dataset.liveUrl || !window.EventSource) {
+        return;
+    }
+    var count = document.getElementById('article-count');
+    var events = new EventSource(list.dataset.liveUrl);
+
+    function element(tag, className, text) {
+        var node = document.createElement(tag);
+        if (className) {
+            node.className = className;
+        }
+        if (text) {
+            node.textContent = text;
+        }
+        return node;
+    }
+
+    function card(article) {
+        var div = element('div', 'article');
+        div.dataset.id = article.id;
+
+        var heading = element('h3');
+        var link = element('a', null, article.title);
+        link.href = article.url;
+        link.target = '_blank';
+        heading.appendChild(link);
+        div.appendChild(heading);
+
+        var meta = element('div', 'article-meta');
+        meta.appendChild(element('span', 'source-badge', article.source));
+        meta.appendChild(document.createTextNode(' '));
+        meta.appendChild(element('span', 'date', article.published_date));
+        if (article.category) {
+            meta.appendChild(document.createTextNode(' • ' + article.category));
+        }
+        div.appendChild(meta);
+
+        if (article.tags.length) {
+            var tags = element('div', 'tags');
+            article.tags.forEach(function (tag) {
+                var tagLink = element('a', 'tag', tag);
+                tagLink.href = '/tags/' + encodeURIComponent(tag);
+                tags.appendChild(tagLink);
+                tags.appendChild(document.createTextNode(' '));
+            });
+            div.appendChild(tags);
+        }
+
+        if (article.summary) {
+            var summary = article.summary.length > 250 ? article.summary.slice(0, 250) + '...' : article.summary;
+            div.appendChild(element('div', 'summary', summary));
+        }
+        return div;
+    }
+
+    events.addEventListener('articles', function (event) {
+        // Oldest first, so each one goes above the previous
+        JSON.parse(event.data).forEach(function (article) {
+            if (list.querySelector('.article[data-id="' + article.id + '"]')) {
+                return;
+            }
+            var empty = document.getElementById('no-articles');
+            if (empty) {
+                empty.remove();
+            }
+            list.insertBefore(card(article), list.firstChild);
+            if (count) {
+                count.textContent = parseInt(count.textContent, 10) + 1;
+            }
+        });
+    });
+
+    // Missed more than the server keeps: offer a reload instead
+    events.addEventListener('reset', function () {
+        events.close();
+        var notice = element('div', 'live-notice', 'Newer articles are available. ');
+        var reload = element('a', null, 'Reload');
+        reload.href = window.location.href;
+        notice.appendChild(reload);
+        list.parentNode.insertBefore(notice, list);
+    });
+})();
@@ -0,0 +1,76 @@
+import html
+import os
+import re
+
+
+TAG_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tag_vocabulary.txt")
+
+# Hashtags must start with a letter so "&#8217;" or "#1" never become tags
+HASHTAG_PATTERN = re.compile(r"(?<![\w&])#([A-Za-z]\w*)")
+
+# Element tags and comments in summaries, so link URLs and attributes never become tags
+MARKUP_PATTERN = re.compile(r"<[A-Za-z/!][^>]*>")
+
+
+def load_vocabulary(path=TAG_VOCABULARY_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _trie_pattern(terms):
+    # Factor shared prefixes ("Data Science", "Database") so the regex engine
+    # walks one branch per character instead of trying every term in turn.
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        end = node.pop("", False)
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if end else body
+
+    return build(trie)
+
+
+class TagExtractor:
+    """Finds vocabulary terms and hashtags in text with one precompiled regex.
+
+    Terms match case-insensitively on word boundaries, with an optional
+    plural "s" ("APIs" tags as "API"), and are returned in the casing used
+    in the vocabulary.
+    """
+
+    def __init__(self, vocabulary):
+        self.canonical = {term.lower(): term for term in vocabulary}
+        self.pattern = re.compile(
+            r"(?<!\w)(" + _trie_pattern(self.canonical) + r")s?(?!\w)",
+            re.IGNORECASE
+        )
+
+    def extract(self, *texts):
+        tags = set()
+        # Each text on its own, so a term can't run from the end of the title into the summary
+        for text in texts:
+            if not text:
+                continue
+            text = html.unescape(MARKUP_PATTERN.sub(" ", text))
+            tags.update(self.canonical[match.lower()] for match in self.pattern.findall(text))
+            tags.update(HASHTAG_PATTERN.findall(text))
+        return list(tags)
+
+
+_default_extractor = None
+
+
+def get_extractor():
+    # Compiled lazily once per process and reused by every fetcher
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = TagExtractor(load_vocabulary())
+    return _default_extractor
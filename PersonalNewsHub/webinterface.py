@@ -1,68 +1,385 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, abort, g, has_request_context, render_template, request, stream_with_context, url_for
+from markupsafe import Markup, escape
+import base64
+import queue
 import sqlite3
 import json
+import math
+import re
+import time
 from datetime import datetime
 
+import metrics
+from database import ReaderPool
+from ingest import TAGS_SQL, get_data_version
+from live_updates import ArticleBroadcaster
+from response_cache import ResponseCache
+
 app = Flask(__name__)
 
 
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that charges time spent inside SQLite to its connection."""
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.connection.db_seconds += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        self.connection.queries += 1
+        return self._timed(super().execute, sql, parameters)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=1):
+        return self._timed(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __next__(self):
+        return self._timed(super().__next__)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Pooled connection that reports its query time and count per route when closed.
+
+    Closing it hands it back to ``pool`` for the next request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.checked_out = False
+        self.route = None
+        self.db_seconds = 0.0
+        self.queries = 0
+
+    def execute(self, sql, parameters=()):
+        return self.cursor(TimedCursor).execute(sql, parameters)
+
+    def close(self):
+        if self.route is not None and self.queries:
+            metrics.REGISTRY.observe("newshub_db_seconds", self.db_seconds, route=self.route)
+            metrics.REGISTRY.inc("newshub_db_queries_total", self.queries, route=self.route)
+        self.route = None
+        self.db_seconds = 0.0
+        self.queries = 0
+        if self.pool is None:
+            super().close()
+        elif self.checked_out:  # A second close() must not release it twice
+            self.checked_out = False
+            self.pool.release(self)
+
+
+# Read-only connections shared by all request threads (see database.py)
+reader_pool = ReaderPool(factory=TimedConnection)
+
+# Seconds a request waits for a pooled connection before it is answered with a 503
+POOL_TIMEOUT = 5.0
+
+
+# Callers close the connection in a finally block: that is what returns it to the pool
 def get_db_connection():
-    conn = sqlite3.connect('news_aggregator.db')
+    conn = reader_pool.acquire(timeout=POOL_TIMEOUT)
+    conn.pool = reader_pool
+    conn.checked_out = True
     conn.row_factory = sqlite3.Row
+    # Streamed responses close the connection after the request ends, so remember the route now
+    conn.route = request.endpoint if has_request_context() else None
     return conn
 
 
-@app.route('/')
-def index():
+def current_data_version():
     conn = get_db_connection()
+    try:
+        return get_data_version(conn)
+    finally:
+        conn.close()
 
-    # Default filters
-    days = int(request.args.get('days', 7))
-    category = request.args.get('category', 'all')
-    source = request.args.get('source', 'all')
-    search = request.args.get('search', '')
 
-    # Build query with filters
-    query = '''
-    SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, GROUP_CONCAT(t.tag, ',') as tags
-    FROM articles a
-    LEFT JOIN article_tags t ON a.id = t.article_id
-    WHERE DATE(a.added_date) >= DATE('now', ? || ' days')
-    '''
-    params = [f'-{days}']
+# Rendered pages, invalidated whenever ingestion bumps the data version
+cache = ResponseCache(current_data_version)
+
+
+# Pushes newly ingested articles to open pages through /events
+broadcaster = ArticleBroadcaster()
+
+# Seconds between comment lines on an idle event stream, so dead clients are noticed
+KEEPALIVE = 15
+
+
+# Every connection stayed checked out for POOL_TIMEOUT; ask the client to come back
+@app.errorhandler(TimeoutError)
+def pool_exhausted(error):
+    metrics.REGISTRY.inc('newshub_db_pool_timeouts_total', route=request.endpoint or 'unknown')
+    return Response('Database busy, try again shortly\n', status=503, mimetype='text/plain',
+                    headers={'Retry-After': str(math.ceil(POOL_TIMEOUT))})
+
+
+# Per-route request timing for /metrics
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.REGISTRY.observe('newshub_http_request_seconds', time.perf_counter() - start,
+                                 route=request.endpoint or 'unknown', method=request.method,
+                                 status=response.status_code)
+    return response
+
+
+# Most used tags, read off the dictionary's article_count index
+POPULAR_TAGS_SQL = '''
+SELECT name as tag, article_count as count FROM tags
+WHERE article_count > 0
+ORDER BY article_count DESC
+LIMIT ?
+'''
+
+# Other articles of the same story, packed as "source\x1furl" entries joined by \x1e
+RELATED_SQL = '''
+(SELECT GROUP_CONCAT(c.source || char(31) || c.url, char(30)) FROM articles c
+ WHERE c.cluster_id = a.cluster_id AND c.id != a.id) as related
+'''
+
+
+@app.template_filter('related_links')
+def related_links(value):
+    if not value:
+        return []
+    return [entry.split('\x1f', 1) for entry in value.split('\x1e')]
+
+
+# Markers FTS5 snippet() puts around matches; swapped for <mark> after escaping
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+# Turn free-text input into a safe FTS5 query: every word quoted, last one as a prefix
+def fts_query(search):
+    words = re.findall(r'\w+', search)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+@app.template_filter('highlight')
+def highlight(text):
+    escaped = str(escape(text or ''))
+    return Markup(escaped.replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+
+PAGE_SIZE = 100
 
-    if category != 'all':
-        query += ' AND a.category = ?'
-        params.append(category)
 
+# Keyset cursors are "<added_date>|<id>" of the last row shown, base64url encoded
+def encode_cursor(row):
+    raw = f"{row['added_date']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        added_date, article_id = raw.rsplit('|', 1)
+        return added_date, int(article_id)
+    except (ValueError, UnicodeDecodeError):
+        abort(400, 'Invalid cursor')
+
+
+# Dashboard article query. Filters are plain range/equality predicates on
+# indexed columns so SQLite can walk idx_articles_* instead of scanning, and
+# pages continue from the (added_date, id) of the previous page's last row.
+# With ``collapse_stories`` each near-duplicate cluster shows up once, as
+# its first-seen article among those passing the same filters, carrying the
+# other sources in ``related``.
+# ``hot`` reads the precomputed hot_articles list (see ranking.py) instead,
+# best first. ``tag_id`` (see get_tag_id) walks that tag's slice of
+# idx_article_tags_tag newest first: ids are AUTOINCREMENT and added_date is
+# the insert time, so descending id is the (added_date, id) order.
+def build_article_query(days=None, category='all', source='all', search='', tag_id=None, after=None, limit=PAGE_SIZE,
+                        collapse_stories=False, hot=False):
+    match = fts_query(search) if search else None
+    related = RELATED_SQL if collapse_stories else 'NULL as related'
+
+    if match:
+        # Ranked full-text search; title matches weigh more than summary matches
+        query = f'''
+        SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, a.added_date,
+               {TAGS_SQL} as tags,
+               snippet(articles_fts, 1, '{SNIPPET_START}', '{SNIPPET_END}', '...', 32) as snippet,
+               {related}
+        FROM articles_fts
+        JOIN articles a ON a.id = articles_fts.rowid
+        WHERE articles_fts MATCH ?
+        '''
+        params = [match]
+    elif hot:
+        query = f'''
+        SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, a.added_date,
+               {TAGS_SQL} as tags,
+               NULL as snippet,
+               {related},
+               h.score
+        FROM hot_articles h
+        JOIN articles a ON a.id = h.article_id
+        WHERE 1 = 1
+        '''
+        params = []
+    elif tag_id is not None:
+        query = f'''
+        SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, a.added_date,
+               {TAGS_SQL} as tags,
+               NULL as snippet,
+               {related}
+        FROM article_tags t2
+        JOIN articles a ON a.id = t2.article_id
+        WHERE t2.tag_id = ?
+        '''
+        params = [tag_id]
+    else:
+        query = f'''
+        SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, a.added_date,
+               {TAGS_SQL} as tags,
+               NULL as snippet,
+               {related}
+        FROM articles a
+        WHERE 1 = 1
+        '''
+        params = []
+
+    # Column filters as predicates on the alias {t}, so story collapsing can apply them to other copies
+    predicates = []
+    if days is not None:
+        predicates.append(("{t}.added_date >= DATE('now', ? || ' days')", [f'-{days}']))
+    if category != 'all':
+        predicates.append(('{t}.category = ?', [category]))
     if source != 'all':
-        query += ' AND a.source = ?'
-        params.append(source)
+        predicates.append(('{t}.source = ?', [source]))
+    for predicate, values in predicates:
+        query += ' AND ' + predicate.format(t='a')
+        params.extend(values)
+
+    if collapse_stories:
+        # A story is shown through its earliest copy that the page would show at all, so
+        # an older copy outside the filters (or archived) doesn't hide the rest
+        if match:
+            predicates.append(('EXISTS (SELECT 1 FROM articles_fts WHERE articles_fts MATCH ? AND rowid = {t}.id)',
+                               [match]))
+        elif hot:
+            predicates.append(('{t}.id IN (SELECT article_id FROM hot_articles)', []))
+        elif tag_id is not None:
+            predicates.append(('{t}.id IN (SELECT article_id FROM article_tags WHERE tag_id = ?)', [tag_id]))
+        # Articles clustered before this feature existed have no cluster_id yet, and a
+        # story's first-seen article (cluster_id = id) has no earlier copy to defer to
+        query += (' AND (a.cluster_id IS NULL OR a.cluster_id = a.id OR NOT EXISTS ('
+                  'SELECT 1 FROM articles c WHERE c.cluster_id = a.cluster_id AND c.id < a.id')
+        for predicate, values in predicates:
+            query += ' AND ' + predicate.format(t='c')
+            params.extend(values)
+        query += '))'
+
+    if match:
+        # Relevance order has no stable key to resume from, so search returns one ranked page
+        query += ' ORDER BY bm25(articles_fts, 10.0, 1.0)'
+    elif hot:
+        # Likewise the hot list is one page out of a short precomputed ranking
+        query += ' ORDER BY h.hot DESC'
+    elif tag_id is not None:
+        if after is not None:
+            query += ' AND t2.article_id < ?'
+            params.append(after[1])
+        query += ' ORDER BY t2.article_id DESC'
+    else:
+        if after is not None:
+            query += ' AND (a.added_date, a.id) < (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY a.added_date DESC, a.id DESC'
+
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+
+    return query, params
+
 
-    if search:
-        query += ' AND (a.title LIKE ? OR a.summary LIKE ?)'
-        search_param = f'%{search}%'
-        params.append(search_param)
-        params.append(search_param)
+# Newest article id; a page passes it to /events to be sent only what arrives after it
+def latest_article_id(conn):
+    return conn.execute('SELECT IFNULL(MAX(id), 0) FROM articles').fetchone()[0]
 
-    query += ' GROUP BY a.id ORDER BY a.added_date DESC LIMIT 100'
 
-    articles = conn.execute(query, params).fetchall()
+def get_tag_id(conn, name):
+    row = conn.execute('SELECT id FROM tags WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else None
 
-    # Get available categories and sources for filters
-    categories = conn.execute('SELECT DISTINCT category FROM articles').fetchall()
-    sources = conn.execute('SELECT DISTINCT source FROM articles').fetchall()
 
-    # Get popular tags
-    tags = conn.execute('''
-    SELECT tag, COUNT(*) as count 
-    FROM article_tags 
-    GROUP BY tag 
-    ORDER BY count DESC 
-    LIMIT 20
-    ''').fetchall()
+# Fetch one page plus one extra row to learn whether another page follows
+def fetch_page(conn, query_args, paginated=True):
+    query, params = build_article_query(**query_args, limit=PAGE_SIZE + 1)
+    rows = conn.execute(query, params).fetchall()
+    next_cursor = None
+    if len(rows) > PAGE_SIZE:
+        rows = rows[:PAGE_SIZE]
+        if paginated:
+            next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def next_page_url(next_cursor, **view_args):
+    if not next_cursor:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return url_for(request.endpoint, **view_args, **args)
+
+
+@app.route('/')
+@cache.cached
+def index():
+    # Default filters, all parsed before a connection is taken
+    days = request.args.get('days', 7, type=int)
+    category = request.args.get('category', 'all')
+    source = request.args.get('source', 'all')
+    search = request.args.get('search', '')
+    sort = request.args.get('sort', 'latest')
+    after = decode_cursor(request.args.get('cursor'))
+    hot = sort == 'hot' and not search
+
+    conn = get_db_connection()
+    try:
+        # New articles are pushed onto the first page of the latest-first list; read
+        # the mark before the page so nothing lands between the two
+        live_url = None
+        if not hot and after is None:
+            live_url = url_for('live_events', days=days, category=category, source=source, search=search or None,
+                               since=latest_article_id(conn))
+        articles, next_cursor = fetch_page(
+            conn,
+            dict(days=days, category=category, source=source, search=search, after=after,
+                 # One card per story, unless the reader asked for a single source's copy
+                 collapse_stories=source == 'all', hot=hot),
+            paginated=not (fts_query(search) or hot)
+        )
 
-    conn.close()
+        # Filter dropdowns come from the stats_* rollup tables, popular tags from the tag dictionary's counts
+        categories = conn.execute('SELECT category FROM stats_category ORDER BY category').fetchall()
+        sources = conn.execute('SELECT source FROM stats_source ORDER BY source').fetchall()
+        tags = conn.execute(POPULAR_TAGS_SQL, (20,)).fetchall()
+    finally:
+        conn.close()
 
     return render_template('index.html',
                            articles=articles,
@@ -72,67 +389,167 @@ def index():
                            selected_days=days,
                            selected_category=category,
                            selected_source=source,
-                           search=search)
+                           search=search,
+                           selected_sort=sort,
+                           live_url=live_url,
+                           next_url=next_page_url(next_cursor))
 
 
 @app.route('/tags/<tag>')
+@cache.cached
 def tag_view(tag):
+    after = decode_cursor(request.args.get('cursor'))
+
     conn = get_db_connection()
+    try:
+        live_url = url_for('live_events', tag=tag, since=latest_article_id(conn)) if after is None else None
+        # Resolve the name once, then page through the tag's integer index
+        tag_id = get_tag_id(conn, tag)
+        if tag_id is None:
+            articles, next_cursor = [], None
+        else:
+            articles, next_cursor = fetch_page(conn, dict(tag_id=tag_id, after=after))
+    finally:
+        conn.close()
+
+    return render_template('tag.html', articles=articles, tag=tag, live_url=live_url,
+                           next_url=next_page_url(next_cursor, tag=tag))
+
+
+# Server-Sent Events: articles ingested after ?since= that match the page's
+# filters, as "articles" events carrying a JSON list. A client too far behind
+# gets a "reset" event and should reload.
+@app.route('/events')
+def live_events():
+    search = request.args.get('search', '')
+    source = request.args.get('source', 'all')
+    tag = request.args.get('tag')
+    filters = dict(
+        days=request.args.get('days', type=int),
+        category=request.args.get('category', 'all'),
+        source=source,
+        tag=tag,
+        match=fts_query(search) if search else None,
+        # Same rule as the pages: the dashboard shows one card per story unless filtered to a source
+        collapse_stories=tag is None and source == 'all'
+    )
+    # EventSource resends the last event id when it reconnects
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    subscription = broadcaster.subscribe(filters, since)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    message = subscription.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message[0] == 'reset':
+                    yield 'event: reset\ndata: {}\n\n'
+                    return
+                _, mark, articles = message
+                # The id alone still moves the client's resume point past articles it didn't match
+                yield f'id: {mark}\n'
+                yield f'event: articles\ndata: {json.dumps(articles)}\n\n' if articles else '\n'
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Rows the API reads per borrowed connection
+API_CHUNK = 500
+
 
-    articles = conn.execute('''
-    SELECT a.id, a.title, a.url, a.source, a.published_date, a.summary, a.category, GROUP_CONCAT(t2.tag, ',') as tags
-    FROM articles a
-    JOIN article_tags t ON a.id = t.article_id
-    LEFT JOIN article_tags t2 ON a.id = t2.article_id
-    WHERE t.tag = ?
-    GROUP BY a.id
-    ORDER BY a.added_date DESC
-    ''', (tag,)).fetchall()
+def read_chunk(conn, query_args, after, remaining):
+    size = API_CHUNK if remaining is None else min(API_CHUNK, remaining)
+    query, params = build_article_query(**query_args, after=after, limit=size)
+    return conn.execute(query, params).fetchall(), size
 
-    conn.close()
 
-    return render_template('tag.html', articles=articles, tag=tag)
+# Streams matching articles as NDJSON. Each line carries its own "cursor";
+# pass the last one back as ?cursor= to resume. Rows are read API_CHUNK at a
+# time with the same keyset cursor, and the connection goes back to the pool
+# between chunks, so a slow client holds none while it drains the stream.
+@app.route('/api/articles')
+def api_articles():
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        abort(400, 'Invalid limit')
+    tag = request.args.get('tag')
+    after = decode_cursor(request.args.get('cursor'))
+    query_args = dict(
+        days=request.args.get('days', type=int),
+        category=request.args.get('category', 'all'),
+        source=request.args.get('source', 'all'),
+    )
+
+    # The first chunk is read before the response starts, so a busy pool is still a 503
+    conn = get_db_connection()
+    try:
+        if tag is not None:
+            query_args['tag_id'] = get_tag_id(conn, tag)
+            if query_args['tag_id'] is None:
+                return Response('', mimetype='application/x-ndjson')  # Unknown tag: no articles
+        rows, size = read_chunk(conn, query_args, after, limit)
+    finally:
+        conn.close()
+
+    def generate(rows, size):
+        remaining = limit
+        while True:
+            for row in rows:
+                yield json.dumps({
+                    "id": row["id"],
+                    "title": row["title"],
+                    "url": row["url"],
+                    "source": row["source"],
+                    "published_date": row["published_date"],
+                    "added_date": row["added_date"],
+                    "summary": row["summary"],
+                    "category": row["category"],
+                    "tags": row["tags"].split(',') if row["tags"] else [],
+                    "cursor": encode_cursor(row)
+                }) + "\n"
+            if remaining is not None:
+                remaining -= len(rows)
+            if not rows or len(rows) < size or remaining == 0:
+                return
+            conn = get_db_connection()
+            try:
+                rows, size = read_chunk(conn, query_args, (rows[-1]["added_date"], rows[-1]["id"]), remaining)
+            finally:
+                conn.close()
+
+    return Response(stream_with_context(generate(rows, size)), mimetype='application/x-ndjson')
 
 
 @app.route('/stats')
+@cache.cached
 def stats():
     conn = get_db_connection()
+    try:
+        # All distributions are read from rollups maintained at ingestion time
+        daily_counts = conn.execute('''
+        SELECT date, count FROM stats_daily ORDER BY date DESC LIMIT 30
+        ''').fetchall()
+
+        sources = conn.execute('''
+        SELECT source, count FROM stats_source ORDER BY count DESC
+        ''').fetchall()
+
+        categories = conn.execute('''
+        SELECT category, count FROM stats_category ORDER BY count DESC
+        ''').fetchall()
 
-    # Get daily article counts
-    daily_counts = conn.execute('''
-    SELECT DATE(added_date) as date, COUNT(*) as count
-    FROM articles
-    GROUP BY DATE(added_date)
-    ORDER BY date DESC
-    LIMIT 30
-    ''').fetchall()
-
-    # Get source distribution
-    sources = conn.execute('''
-    SELECT source, COUNT(*) as count
-    FROM articles
-    GROUP BY source
-    ORDER BY count DESC
-    ''').fetchall()
-
-    # Get category distribution
-    categories = conn.execute('''
-    SELECT category, COUNT(*) as count
-    FROM articles
-    GROUP BY category
-    ORDER BY count DESC
-    ''').fetchall()
-
-    # Get tag distribution
-    tags = conn.execute('''
-    SELECT tag, COUNT(*) as count
-    FROM article_tags
-    GROUP BY tag
-    ORDER BY count DESC
-    LIMIT 50
-    ''').fetchall()
-
-    conn.close()
+        tags = conn.execute(POPULAR_TAGS_SQL, (50,)).fetchall()
+    finally:
+        conn.close()
 
     return render_template('stats.html',
                            daily_counts=daily_counts,
@@ -141,5 +558,28 @@ def stats():
                            tags=tags)
 
 
+# Prometheus scrape endpoint: this process's request and query timings plus
+# the fetcher's per-source phase timings and counters saved in the database
+@app.route('/metrics')
+def metrics_view():
+    combined = metrics.Registry()
+    combined.merge(metrics.REGISTRY.dump())
+    combined.set('newshub_response_cache_hits_total', cache.hits)
+    combined.set('newshub_response_cache_misses_total', cache.misses)
+
+    conn = get_db_connection()
+    try:
+        combined.merge(metrics.load_snapshots(conn).dump())
+    except sqlite3.OperationalError:
+        pass  # No fetcher has run against this database yet
+    finally:
+        conn.close()
+
+    return Response(combined.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
+    # Create or upgrade the schema (indexes, search index, rollups) before serving
+    from personalnewsaggregator import setup_database
+    setup_database()[0].close()
     app.run(debug=True)
\ No newline at end of file
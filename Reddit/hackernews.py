@@ -1,7 +1,12 @@
+import importlib.util
+
 import requests
 from bs4 import BeautifulSoup
 import time
 
+# lxml is several times faster than the pure-Python html.parser backend, when it is installed
+PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
 
 def scrape_hacker_news_headlines(url="https://news.ycombinator.com/", num_headlines=30, delay=0.5):
     """Scrapes headlines from Hacker News with error handling and rate limiting."""
@@ -13,7 +18,7 @@ def scrape_hacker_news_headlines(url="https://news.ycombinator.com/", num_headli
     try:
         response = requests.get(url, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = BeautifulSoup(response.content, PARSER)
 
         headlines = []
         # Updated selector: HN uses 'titleline' class but not inside a span with that class